@@ -1,537 +1,651 @@
-from flask import Flask, render_template, request
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-import time
-import re
-
-app = Flask(__name__)
-
-categories = {
-    # BBC Sources
-    "BBC Politics": "https://www.bbc.com/news/politics",
-    "BBC Finance": "https://www.bbc.com/news/business", 
-    "BBC Entertainment": "https://www.bbc.com/news/entertainment_and_arts",
-    "BBC Sports": "https://www.bbc.com/sport",
-    "BBC India": "https://www.bbc.com/news/world/asia/india",
-
-    # The Hindu Sources
-    "Hindu National": "https://www.thehindu.com/news/national/",
-    "Hindu Business": "https://www.thehindu.com/business/",
-    "Hindu Sport": "https://www.thehindu.com/sport/",
-    "Hindu Entertainment": "https://www.thehindu.com/entertainment/",
-    "Hindu Science": "https://www.thehindu.com/sci-tech/science/",
-
-    # Al Jazeera Sources
-    "AlJazeera Middle East": "https://www.aljazeera.com/middle-east/",
-    "AlJazeera Asia": "https://www.aljazeera.com/asia/",
-    "AlJazeera Economy": "https://www.aljazeera.com/economy/",
-    "AlJazeera Sports": "https://www.aljazeera.com/sports/",
-    "AlJazeera Features": "https://www.aljazeera.com/features/"
-}
-
-def get_source_type(category):
-    if category.startswith("BBC"):
-        return "bbc"
-    elif category.startswith("Hindu"):
-        return "hindu"
-    elif category.startswith("AlJazeera"):
-        return "aljazeera"
-    return "unknown"
-
-def get_articles(category_name, max_articles=10, start_date=None, end_date=None):
-    if category_name not in categories:
-        return f"No such category: {category_name}"
-
-    url = categories[category_name]
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.75 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.google.com/'
-    }
-    source_type = get_source_type(category_name)
-
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        time.sleep(1)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        if source_type == "bbc":
-            return scrape_bbc(soup, category_name, url, headers, max_articles, start_date, end_date)
-        elif source_type == "hindu":
-            return scrape_hindu(soup, url, headers, max_articles, start_date, end_date)
-        elif source_type == "aljazeera":
-            return scrape_aljazeera(soup, url, headers, max_articles, start_date, end_date)
-        else:
-            return []
-    except Exception as e:
-        print(f"Error fetching articles from {category_name}: {str(e)}")
-        return []
-
-def scrape_bbc(soup, category_name, base_url, headers, max_articles, start_date, end_date):
-    news_list = []
-    seen_urls = set()
-    articles = soup.select('a[href^="/sport"]' if category_name == "BBC Sports" else 'a[href^="/news"]')
-
-    for article in articles:
-        if len(news_list) >= max_articles:
-            break
-
-        href = article.get('href')
-        if not href or len(href.split('/')) < 3 or "live" in href or "#" in href:
-            continue
-        link = "https://www.bbc.com" + href
-        if link in seen_urls:
-            continue
-        seen_urls.add(link)
-
-        try:
-            article_response = requests.get(link, headers=headers)
-            time.sleep(1.5)
-            article_soup = BeautifulSoup(article_response.text, 'html.parser')
-            headline_tag = article_soup.find('h1') or article_soup.find('h2')
-            summary_tag = article_soup.find('p')
-            date_tag = article_soup.find('time')
-
-            if date_tag and date_tag.has_attr('datetime'):
-                published = date_tag['datetime'][:10]
-                published_date = datetime.strptime(published, "%Y-%m-%d").date()
-            else:
-                continue
-
-            if (start_date and published_date < start_date) or (end_date and published_date > end_date):
-                continue
-
-            if headline_tag and summary_tag:
-                news_list.append({
-                    'headline': headline_tag.get_text(strip=True),
-                    'summary': summary_tag.get_text(strip=True),
-                    'link': link,
-                    'published_date': published,
-                    'formatted_date': published_date.strftime("%B %d, %Y"),
-                    'source': 'BBC News'
-                })
-        except Exception as e:
-            print(f"Error processing BBC article {link}: {str(e)}")
-            continue
-
-    return news_list
-
-def scrape_hindu(soup, base_url, headers, max_articles, start_date, end_date):
-    news_list = []
-    seen_urls = set()
-    
-    # Just get all links from the page first
-    all_links = soup.find_all('a', href=True)
-    article_links = []
-    
-    # Filter links that likely point to articles
-    for link in all_links:
-        href = link.get('href', '')
-        # Look for article patterns in URLs
-        if (href.startswith('https://www.thehindu.com/') or href.startswith('/')) and \
-           any(pattern in href for pattern in ['/article', '/news/', '/business/', '/sport/', '/sci-tech/', '/entertainment/']):
-            if href.startswith('/'):
-                href = 'https://www.thehindu.com' + href
-            article_links.append(href)
-    
-    # Remove duplicates
-    article_links = list(set(article_links))
-    print(f"Found {len(article_links)} potential Hindu article links")
-    
-    # Process each article link
-    for href in article_links:
-        if len(news_list) >= max_articles:
-            break
-            
-        if href in seen_urls:
-            continue
-            
-        seen_urls.add(href)
-        
-        try:
-            print(f"Fetching The Hindu article: {href}")
-            res = requests.get(href, headers=headers, timeout=15)
-            time.sleep(2)  # Longer delay to avoid rate limiting
-            
-            if res.status_code != 200:
-                print(f"Failed to fetch article, status code: {res.status_code}")
-                continue
-                
-            article_soup = BeautifulSoup(res.text, 'html.parser')
-            
-            # Try different headline approaches
-            headline = None
-            # First try common classes
-            headline_element = (
-                article_soup.find('h1', class_='title') or 
-                article_soup.find('h1', class_='article-title') or
-                article_soup.find('h1', itemprop='headline') or
-                article_soup.find('h1', class_='story-headline') or
-                article_soup.find('h1')
-            )
-            if headline_element:
-                headline = headline_element.get_text(strip=True)
-            
-            # If still no headline, check title tag
-            if not headline or not headline.strip():
-                title_tag = article_soup.find('title')
-                if title_tag:
-                    title_text = title_tag.get_text(strip=True)
-                    if ' - The Hindu' in title_text:
-                        headline = title_text.split(' - The Hindu')[0].strip()
-            
-            # Try to find summary
-            summary = None
-            
-            # First check meta description
-            meta_desc = article_soup.find('meta', attrs={'name': 'description'})
-            if meta_desc and 'content' in meta_desc.attrs:
-                summary = meta_desc['content']
-            
-            # If no meta description, try different paragraph selectors
-            if not summary:
-                for selector in ['.lead-text', '.article-text p', '.article p', 'article p', '.story-content p']:
-                    paragraphs = article_soup.select(selector)
-                    if paragraphs:
-                        # Use the first paragraph that's not too short
-                        for p in paragraphs:
-                            text = p.get_text(strip=True)
-                            if len(text) > 30:  # Skip very short paragraphs
-                                summary = text
-                                break
-                        if summary:
-                            break
-            
-            # If still no summary, use any paragraph
-            if not summary:
-                paragraphs = article_soup.find_all('p')
-                for p in paragraphs:
-                    if p.parent and not any(cls in str(p.parent.get('class', '')) for cls in ['footer', 'comment', 'author', 'social']):
-                        text = p.get_text(strip=True)
-                        if len(text) > 30:
-                            summary = text
-                            break
-            
-            # Look for date information
-            published_date = None
-            
-            # Check for structured data first
-            script_tags = article_soup.find_all('script', {'type': 'application/ld+json'})
-            for script in script_tags:
-                if script.string:
-                    try:
-                        import json
-                        data = json.loads(script.string)
-                        if isinstance(data, dict):
-                            date_str = None
-                            # Check for different date fields
-                            for field in ['datePublished', 'dateModified', 'publishedDate']:
-                                if field in data:
-                                    date_str = data[field]
-                                    break
-                            if date_str:
-                                # Handle different date formats
-                                if 'T' in date_str:
-                                    date_str = date_str.split('T')[0]
-                                published_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                                break
-                    except:
-                        pass
-            
-            # If not found, try HTML elements
-            if not published_date:
-                date_patterns = [
-                    r'(\w+ \d{1,2}, \d{4})',   # April 15, 2025
-                    r'(\d{1,2} \w+ \d{4})',     # 15 April 2025
-                    r'(\d{1,2}-\w+-\d{4})',     # 15-Apr-2025
-                    r'(\d{2}/\d{2}/\d{4})',     # 15/04/2025
-                    r'(\d{4}-\d{2}-\d{2})'      # 2025-04-15
-                ]
-                
-                # Try specific date elements first
-                for selector in [
-                    '.dateline', '.date-line', '.publish-time', '.update-time', 
-                    'time', '[itemprop="datePublished"]', '[itemprop="dateModified"]', 
-                    '.article-date', '.storydate', '.story-date-time', '.meta-datetime', '.article__published'
-                ]:
-                    date_elements = article_soup.select(selector)
-                    for element in date_elements:
-                        # Check for datetime attribute
-                        if element.has_attr('datetime'):
-                            datetime_attr = element['datetime']
-                            try:
-                                if 'T' in datetime_attr:
-                                    datetime_attr = datetime_attr.split('T')[0]
-                                published_date = datetime.strptime(datetime_attr, "%Y-%m-%d").date()
-                                break
-                            except:
-                                pass
-                        
-                        # Check text content
-                        date_text = element.get_text(strip=True)
-                        # Apply each regex pattern
-                        for pattern in date_patterns:
-                            match = re.search(pattern, date_text)
-                            if match:
-                                date_str = match.group(1)
-                                try:
-                                    if '-' in date_str and not date_str[0].isdigit():
-                                        # Handle 15-Apr-2025 format
-                                        published_date = datetime.strptime(date_str, "%d-%b-%Y").date()
-                                    elif '-' in date_str and len(date_str.split('-')[0]) == 4:
-                                        # Handle 2025-04-15 format
-                                        published_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                                    elif '/' in date_str:
-                                        # Handle 15/04/2025 format
-                                        published_date = datetime.strptime(date_str, "%d/%m/%Y").date()
-                                    elif ',' in date_str:
-                                        # Handle April 15, 2025 format
-                                        published_date = datetime.strptime(date_str, "%B %d, %Y").date()
-                                    else:
-                                        # Handle 15 April 2025 format
-                                        published_date = datetime.strptime(date_str, "%d %B %Y").date()
-                                    break
-                                except ValueError:
-                                    pass
-                        
-                        if published_date:
-                            break
-                    
-                    if published_date:
-                        break
-            
-            # If still no date, check the URL for a date pattern
-            if not published_date:
-                url_date_pattern = r'/(\d{4})/(\d{1,2})/(\d{1,2})/'
-                url_match = re.search(url_date_pattern, href)
-                if url_match:
-                    year, month, day = url_match.groups()
-                    try:
-                        published_date = datetime(int(year), int(month), int(day)).date()
-                    except ValueError:
-                        pass
-            
-            # Use today's date as a last resort
-            if not published_date:
-                published_date = datetime.today().date()
-                print(f"Using today's date for article: {href}")
-                
-            # Skip if outside date range
-            if (start_date and published_date < start_date) or (end_date and published_date > end_date):
-                continue
-
-            # Only add the article if we have both headline and summary
-            if headline and summary:
-                news_list.append({
-                    'headline': headline,
-                    'summary': summary[:300] + '...' if len(summary) > 300 else summary,
-                    'link': href,
-                    'published_date': published_date.strftime("%Y-%m-%d"),
-                    'formatted_date': published_date.strftime("%B %d, %Y"),
-                    'source': 'The Hindu'
-                })
-        except Exception as e:
-            print(f"Error processing The Hindu article {href}: {str(e)}")
-            continue
-
-    return news_list
-
-def scrape_aljazeera(soup, base_url, headers, max_articles, start_date, end_date):
-    news_list = []
-    seen_urls = set()
-    
-    # Updated selectors for Al Jazeera
-    article_containers = soup.select('.gc--type-post, .gc--type-custompost, article, .article-card')
-    article_links = []
-    
-    # First try to find links within containers
-    for container in article_containers:
-        link_tag = container.find('a')
-        if link_tag and link_tag.has_attr('href'):
-            article_links.append(link_tag)
-    
-    # If that didn't work, try a more generic approach
-    if not article_links:
-        article_links = soup.select('a[href*="/20"], a[href*="/news/"]')
-    
-    print(f"Found {len(article_links)} Al Jazeera article links")
-    
-    for tag in article_links:
-        if len(news_list) >= max_articles:
-            break
-            
-        href = tag.get('href')
-        if not href:
-            continue
-            
-        # Skip non-article links
-        if any(skip in href for skip in ['javascript:', '#', 'mailto:', '/tag/', '/author/']):
-            continue
-            
-        # Ensure full URL
-        if href.startswith('/'):
-            href = 'https://www.aljazeera.com' + href
-        elif not href.startswith('http'):
-            continue
-            
-        if href in seen_urls:
-            continue
-            
-        seen_urls.add(href)
-        
-        try:
-            print(f"Fetching Al Jazeera article: {href}")
-            res = requests.get(href, headers=headers, timeout=10)
-            time.sleep(1.5)
-            
-            if res.status_code != 200:
-                print(f"Failed to fetch article, status code: {res.status_code}")
-                continue
-                
-            article_soup = BeautifulSoup(res.text, 'html.parser')
-            
-            # Try different headline selectors
-            headline = (
-                article_soup.find('h1', class_='article__title') or
-                article_soup.find('h1', class_='post-title') or
-                article_soup.find('h1')
-            )
-            
-            # Try different summary extraction methods
-            summary = None
-            meta = article_soup.find('meta', attrs={'name': 'description'})
-            if meta and 'content' in meta.attrs:
-                summary = meta['content']
-            else:
-                # Try to get first paragraph
-                first_para = article_soup.select_one('.article__content p, .article-p, .wysiwyg p')
-                if first_para:
-                    summary = first_para.get_text(strip=True)
-            
-            # Look for date in multiple places
-            published_date = None
-            
-            # First try JSON-LD data
-            script_tags = article_soup.find_all('script', {'type': 'application/ld+json'})
-            for script in script_tags:
-                if script.string:
-                    try:
-                        import json
-                        data = json.loads(script.string)
-                        if isinstance(data, dict) and 'datePublished' in data:
-                            date_str = data['datePublished'].split('T')[0]
-                            published_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                            break
-                    except:
-                        pass
-            
-            # If not found, try various HTML elements
-            if not published_date:
-                for date_selector in [
-                    'time', '.article-dates', '.date-simple', '.article-date',
-                    '[data-testid="article-date"]', '.published-date', '.post-date'
-                ]:
-                    date_element = article_soup.select_one(date_selector)
-                    if date_element:
-                        if date_element.has_attr('datetime'):
-                            try:
-                                date_str = date_element['datetime'].split('T')[0]
-                                published_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                                break
-                            except:
-                                pass
-                        
-                        date_text = date_element.get_text(strip=True)
-                        # Try to extract date with regex
-                        date_patterns = [
-                            r'(\d{1,2} \w+ \d{4})',  # 15 April 2025
-                            r'(\w+ \d{1,2}, \d{4})',  # April 15, 2025
-                            r'(\d{4}-\d{2}-\d{2})',   # 2025-04-15
-                            r'(\d{2}/\d{2}/\d{4})'    # 15/04/2025
-                        ]
-                        
-                        for pattern in date_patterns:
-                            match = re.search(pattern, date_text)
-                            if match:
-                                date_str = match.group(1)
-                                try:
-                                    if '-' in date_str:
-                                        published_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                                    elif '/' in date_str:
-                                        published_date = datetime.strptime(date_str, "%d/%m/%Y").date()
-                                    elif ',' in date_str:
-                                        published_date = datetime.strptime(date_str, "%B %d, %Y").date()
-                                    else:
-                                        published_date = datetime.strptime(date_str, "%d %B %Y").date()
-                                    break
-                                except ValueError:
-                                    pass
-                        
-                        if published_date:
-                            break
-            
-            if not published_date:
-                # If no date found, use current date
-                published_date = datetime.today().date()
-                
-            if (start_date and published_date < start_date) or (end_date and published_date > end_date):
-                continue
-
-            if headline and summary:
-                headline_text = headline.get_text(strip=True)
-                if headline_text:  # Ensure headline is not empty
-                    news_list.append({
-                        'headline': headline_text,
-                        'summary': summary[:300] + '...' if len(summary) > 300 else summary,
-                        'link': href,
-                        'published_date': published_date.strftime("%Y-%m-%d"),
-                        'formatted_date': published_date.strftime("%B %d, %Y"),
-                        'source': 'Al Jazeera'
-                    })
-        except Exception as e:
-            print(f"Error processing Al Jazeera article {href}: {str(e)}")
-            continue
-
-    return news_list
-
-@app.route('/', methods=['GET', 'POST'])
-def index():
-    articles = None
-    category = None
-    start_date = None
-    end_date = None
-    search_performed = False
-
-    current_utc = "2025-04-22 12:34:01"
-    user_login = "Lokesh-172"
-
-    if request.method == 'POST':
-        category = request.form.get('category')
-        start_date_input = request.form.get('start_date')
-        end_date_input = request.form.get('end_date')
-        search_performed = True
-
-        try:
-            start_date = datetime.strptime(start_date_input, "%Y-%m-%d").date() if start_date_input else None
-            end_date = datetime.strptime(end_date_input, "%Y-%m-%d").date() if end_date_input else datetime.today().date()
-        except:
-            start_date = None
-            end_date = datetime.today().date()
-
-        articles = get_articles(category, start_date=start_date, end_date=end_date)
-
-    return render_template('index.html', 
-                           articles=articles, 
-                           category=category,
-                           categories=categories,
-                           start_date=start_date, 
-                           end_date=end_date,
-                           search_performed=search_performed,
-                           current_utc=current_utc,
-                           user_login=user_login)
-
-if __name__ == '__main__':
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context, url_for
+from datetime import datetime, timezone
+
+import logs
+import settings
+from article_store import get_store
+from crawler import CrawlScheduler
+from dates import hint_stats, plan_fetches
+from dedup import collapse, url_key
+from extraction import (article_from_fields, discover_links, extract_article, extract_article_head, feed_entries,
+                        meta_description, page_prefix)
+from feeds import parse_feed
+from fetcher import READ_REST, connection_stats, fetch, fetch_partial, get_cache, iter_concurrently, source_available
+from jobs import JobManager
+from metrics import (articles_total, crawls_total, expose, feed_entries_total, partial_fetch_bytes_total,
+                     register_collector, sample_lines, stage_seconds, timed)
+from parsing import parse_html, parse_article
+from sources import get_registry
+
+app = Flask(__name__)
+
+# Article pages rarely change once published, so cached copies are served
+# without revalidation for this long (seconds). Listing pages always revalidate.
+ARTICLE_CACHE_TTL = 24 * 60 * 60
+# Once its head is in, the start of an article page read in part is parsed
+# again only after this many more bytes have arrived, not on every chunk
+HEAD_PARSE_STEP = 16 * 1024
+
+registry = get_registry()
+categories = registry.categories
+
+# Group names accepted by the fan-out API in place of single categories
+category_groups = {"all sources": lambda category: True}
+for source in registry.sources.values():
+    category_groups[f"all {source.group}"] = lambda category, source=source: category in source.categories
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.75 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.google.com/'
+}
+
+# Seconds each category gets in a fan-out query before whatever is already
+# stored for it is returned instead
+FANOUT_BUDGET = 20
+# Upper bounds for the per-category article count and budget clients ask for
+MAX_ARTICLES_LIMIT = 50
+MAX_FANOUT_BUDGET = 60
+
+fanout_executor = ThreadPoolExecutor(max_workers=len(categories), thread_name_prefix="fanout")
+
+# Searches run here; identical searches in flight share one job
+jobs = JobManager(settings.JOB_WORKERS, settings.JOB_KEEP_SECONDS)
+
+# One live crawl per listing at a time, whether a search or a scheduled run
+crawl_locks = {}
+crawl_locks_lock = threading.Lock()
+
+def crawl_lock(category_name):
+    with crawl_locks_lock:
+        return crawl_locks.setdefault(category_name, threading.Lock())
+
+def get_source_type(category):
+    source = registry.source_for(category)
+    return source.id if source else "unknown"
+
+def get_articles(category_name, max_articles=10, start_date=None, end_date=None, since=None):
+    if category_name not in categories:
+        return f"No such category: {category_name}"
+
+    store = get_store()
+    # Only scrape live when the background crawler hasn't refreshed this
+    # listing recently; otherwise answer the date range from the store
+    if not store.is_fresh(category_name):
+        job, _ = submit_search(category_name, max_articles, start_date, end_date)
+        job.wait()
+        if job.status == "failed":
+            raise RuntimeError(job.error)
+    return store.query(category_name, start_date, end_date, max_articles, since)
+
+def submit_search(category_name, max_articles=10, start_date=None, end_date=None):
+    # Returns (job, coalesced); the job's results are stream_articles' output
+    params = {
+        'category': category_name,
+        'max_articles': max_articles,
+        'start_date': start_date.strftime("%Y-%m-%d") if start_date else None,
+        'end_date': end_date.strftime("%Y-%m-%d") if end_date else None,
+    }
+    key = (category_name, max_articles, start_date, end_date)
+    return jobs.submit(key, params, stream_articles, category_name, max_articles, start_date, end_date)
+
+def stream_articles(category_name, max_articles=10, start_date=None, end_date=None):
+    # Known articles go out immediately; if the listing is stale, newly
+    # scraped ones follow as each article page is fetched and parsed
+    store = get_store()
+    seen_urls = set()
+    for article in store.query(category_name, start_date, end_date, max_articles):
+        seen_urls.add(article['link'])
+        yield article
+
+    if store.is_fresh(category_name):
+        return
+    scraped = 0
+    for article in iter_category(category_name, max_articles, start_date, end_date):
+        if article['link'] not in seen_urls:
+            seen_urls.add(article['link'])
+            scraped += 1
+            yield article
+    # A crawl of the same listing that ran meanwhile stored its articles
+    # instead of this one fetching them again
+    for article in store.query(category_name, start_date, end_date, max_articles):
+        if scraped >= max_articles:
+            break
+        if article['link'] not in seen_urls:
+            seen_urls.add(article['link'])
+            scraped += 1
+            yield article
+
+def expand_categories(names):
+    expanded = []
+    for name in names:
+        if not isinstance(name, str):
+            raise ValueError(f"Invalid category: {name!r}")
+        if name in category_groups:
+            matches = [c for c in categories if category_groups[name](c)]
+        elif name in categories:
+            matches = [name]
+        else:
+            raise ValueError(f"No such category: {name}")
+        expanded.extend(c for c in matches if c not in expanded)
+    return expanded
+
+def get_articles_for(category_names, max_articles=10, start_date=None, end_date=None, budget=FANOUT_BUDGET,
+                     since=None):
+    # Categories are scraped in parallel; one that overruns the budget keeps
+    # crawling in the background and contributes what is already stored
+    futures = {
+        fanout_executor.submit(get_articles, name, max_articles, start_date, end_date, since): name
+        for name in category_names
+    }
+    done, _ = wait(futures, timeout=budget)
+
+    status = {}
+    merged = {}
+    for future, name in futures.items():
+        if future in done and future.exception() is None:
+            found = future.result()
+            # A source whose circuit is open is answered from the store alone
+            state = "ok" if source_available(get_source_type(name)) else "circuit_open"
+            status[name] = {"status": state, "count": len(found)}
+        else:
+            found = get_store().query(name, start_date, end_date, max_articles, since)
+            state = "timeout" if future not in done else "error"
+            status[name] = {"status": state, "count": len(found)}
+        # Clients polling for new articles pass this back as `since`
+        status[name]["crawled_at"] = get_store().last_crawled(name)
+        for article in found:
+            merged.setdefault(url_key(article['link']), dict(article, category=name))
+
+    # The same story under different URLs, in other categories or from other
+    # sources, is listed once with the rest under 'duplicates'
+    articles = sorted(merged.values(), key=lambda article: article['published_date'], reverse=True)
+    return collapse(articles), status
+
+def crawl_category(category_name, max_articles=settings.CRAWL_MAX_ARTICLES, start_date=None, end_date=None):
+    for _ in iter_category(category_name, max_articles, start_date, end_date):
+        pass
+
+def iter_category(category_name, max_articles=settings.CRAWL_MAX_ARTICLES, start_date=None, end_date=None):
+    source = registry.source_for(category_name)
+    if source is None:
+        return
+    url = categories[category_name]
+    headers = dict(DEFAULT_HEADERS, **source.headers)
+    source_type = source.id
+    found = 0
+    if not source_available(source_type):
+        crawls_total.inc(source_type, category_name, "circuit_open")
+        logs.info("crawl_skipped", source=source_type, category=category_name, reason="circuit_open")
+        return
+    lock = crawl_lock(category_name)
+    if not lock.acquire(blocking=False):
+        # Another crawl of this listing is running; wait for it rather than
+        # fetch the same pages at once, and skip this one if it left the
+        # listing fresh
+        lock.acquire()
+        if get_store().is_fresh(category_name):
+            lock.release()
+            crawls_total.inc(source_type, category_name, "coalesced")
+            logs.info("crawl_skipped", source=source_type, category=category_name, reason="coalesced")
+            return
+
+    started = time.perf_counter()
+    try:
+        # A feed usually carries every field, so its articles need no page
+        # fetch; the listing page is the fallback when there's no feed
+        feed = source.feed_for(category_name)
+        entries = read_feed(source, category_name, feed, headers) if feed else None
+        if entries is not None:
+            links = list(entries)
+            hints = {link: (entry['published_date'],) * 2
+                     for link, entry in entries.items() if entry.get('published_date')}
+        else:
+            entries = {}
+            with timed("fetch", source_type, category_name):
+                response = fetch(url, headers, source_type, revalidate=True)
+                response.raise_for_status()
+            with timed("parse", source_type, category_name):
+                soup = parse_html(response.text, source_type)
+            links, hints = discover_links(source, category_name, soup)
+
+        links, hint_skipped = plan_article_fetches(source_type, category_name, links, hints, start_date, end_date)
+        for article in iter_concurrently(
+            links,
+            lambda link: scrape_article(source, link, category_name, headers, start_date, end_date, entries.get(link)),
+            source_type,
+            max_articles
+        ):
+            found += 1
+            yield article
+
+        # Pages refused by an open circuit weren't crawled; leave the listing
+        # stale so the next request or scheduled run tries again
+        if not source_available(source_type):
+            crawls_total.inc(source_type, category_name, "circuit_open")
+            logs.warning("crawl_interrupted", source=source_type, category=category_name, articles=found,
+                         reason="circuit_open")
+            return
+        # Only a crawl that fetched every candidate on the listing makes it
+        # fresh. One restricted to a date range, or stopped at max_articles
+        # with candidates left, leaves articles for other queries to fetch.
+        unrestricted = start_date is None and (end_date is None or end_date >= datetime.today().date())
+        exhausted = found < max_articles or len(links) <= max_articles
+        complete = unrestricted and not hint_skipped and exhausted
+        if complete:
+            get_store().mark_crawled(category_name)
+        crawls_total.inc(source_type, category_name, "ok")
+        logs.info("crawl_finished", source=source_type, category=category_name, articles=found, complete=complete,
+                  seconds=round(time.perf_counter() - started, 3))
+    except Exception as e:
+        # Callers learn of the failure too: a failed search job shows as an
+        # "error" status, and the scheduler records it as the last error
+        crawls_total.inc(source_type, category_name, "failed")
+        logs.error("crawl_failed", source=source_type, category=category_name, error=str(e))
+        raise
+    finally:
+        lock.release()
+
+def plan_article_fetches(source_type, category_name, urls, hints, start_date, end_date):
+    # Drop candidates already in the store, already found not to be articles
+    # or hinted outside the date range. Links that appeared on the listing
+    # since its last crawl go before ones left over from earlier crawls.
+    # Returns the links to fetch and how many were skipped on date hints.
+    store = get_store()
+    first_listed = set(store.update_frontier(category_name, urls))
+    new_urls = store.new_urls(urls, category_name)
+    new_urls = [url for url in new_urls if url in first_listed] + [url for url in new_urls if url not in first_listed]
+    planned = plan_fetches(source_type, new_urls, hints, start_date, end_date)
+    articles_total.inc(source_type, category_name, "known", amount=len(urls) - len(new_urls))
+    articles_total.inc(source_type, category_name, "hint_skipped", amount=len(new_urls) - len(planned))
+    logs.info("listing_parsed", source=source_type, category=category_name, candidates=len(urls),
+              known=len(urls) - len(new_urls), hint_skipped=len(new_urls) - len(planned), planned=len(planned))
+    return planned, len(new_urls) - len(planned)
+
+def read_feed(source, category_name, feed, headers):
+    # The category's entries by link, or None if the feed can't be used
+    source_type = source.id
+    try:
+        with timed("fetch", source_type, category_name):
+            response = fetch(feed["url"], headers, source_type, revalidate=True)
+            response.raise_for_status()
+        with timed("parse", source_type, category_name):
+            entries = feed_entries(source, category_name, parse_feed(response.content))
+    except Exception as e:
+        feed_entries_total.inc(source_type, category_name, "failed")
+        logs.warning("feed_failed", source=source_type, category=category_name, url=feed["url"], error=str(e))
+        return None
+
+    complete = sum(1 for link, entry in entries.items() if article_from_fields(source, link, entry))
+    feed_entries_total.inc(source_type, category_name, "complete", amount=complete)
+    feed_entries_total.inc(source_type, category_name, "partial", amount=len(entries) - complete)
+    return entries
+
+def scrape_article(source, link, category_name, headers, start_date, end_date, fields=None):
+    # Pages are only fetched for what the feed entry (if any) doesn't carry
+    try:
+        article = article_from_fields(source, link, fields) if fields else None
+        if article is None:
+            article = fetch_and_extract(link, source, category_name, headers, fields)
+        if article:
+            return keep_article(article, source.id, category_name, start_date, end_date)
+    except Exception as e:
+        article_failed(link, source.id, category_name, e)
+    return None
+
+def fetch_and_extract(link, source, category_name, headers, known=None):
+    source_type = source.id
+    max_bytes = source.head_fetch_bytes()
+    if max_bytes:
+        # Without the article the response holds the whole page
+        res, article = fetch_article_head(link, source, category_name, headers, known, max_bytes)
+        if article:
+            return article
+    else:
+        with timed("fetch", source_type, category_name):
+            res = fetch(link, headers, source_type, timeout=source.fetch_timeout, min_ttl=ARTICLE_CACHE_TTL)
+    if res.status_code != 200:
+        if res.status_code in (404, 410):
+            get_store().mark_seen(link, "gone")
+        articles_total.inc(source_type, category_name, "failed")
+        logs.warning("article_http_error", source=source_type, category=category_name, url=link, status=res.status_code)
+        return None
+    with timed("parse", source_type, category_name):
+        article_soup = parse_article(res.text, source_type)
+    with timed("extract", source_type, category_name):
+        article = extract_article(source, article_soup, link, known)
+    if not article:
+        get_store().mark_seen(link, "incomplete")
+        articles_total.inc(source_type, category_name, "incomplete")
+    return article
+
+def fetch_article_head(link, source, category_name, headers, known, max_bytes):
+    # Reads the page only until its head (and the headline and date elements,
+    # if they aren't in it) yield every field. Returns the response, whole
+    # unless the article was found, and the article.
+    source_type = source.id
+    found = {'article': None, 'head': None, 'parsed': 0, 'seconds': 0.0}
+
+    def enough(data):
+        if found['head'] is None:
+            head_end = data.lower().find(b'</head>')
+            if head_end < 0:
+                return False
+        elif len(data) - found['parsed'] < HEAD_PARSE_STEP:
+            return False
+        started = time.perf_counter()
+        try:
+            if found['head'] is None:
+                with timed("parse", source_type, category_name):
+                    found['head'] = parse_article(data[:head_end + len(b'</head>')], source_type)
+                if not (known and known.get('summary')) and meta_description(found['head']) is None:
+                    # With no meta description the summary is in the body, so
+                    # the whole page is needed anyway
+                    return READ_REST
+            with timed("parse", source_type, category_name):
+                article_soup = parse_article(page_prefix(data), source_type)
+            found['parsed'] = len(data)
+            with timed("extract", source_type, category_name):
+                found['article'] = extract_article_head(source, article_soup, link, known, found['head'])
+        finally:
+            found['seconds'] += time.perf_counter() - started
+        return found['article'] is not None
+
+    # Time spent in enough() is already counted as parse and extract
+    started = time.perf_counter()
+    res = fetch_partial(link, headers, source_type, enough, max_bytes, timeout=source.fetch_timeout,
+                        min_ttl=ARTICLE_CACHE_TTL)
+    stage_seconds.observe(time.perf_counter() - started - found['seconds'], "fetch", source_type, category_name)
+    article = found['article']
+    length = res.headers.get('Content-Length', '')
+    if article and res.partial and length.isdigit():
+        partial_fetch_bytes_total.inc(source_type, "saved", amount=max(0, int(length) - res.bytes_read))
+    return res, article
+
+def keep_article(article, source_type, category_name, start_date, end_date):
+    # Every parsed article is stored, even outside the requested range, so it
+    # never has to be fetched again for a later query
+    with timed("filter", source_type, category_name):
+        get_store().save(article, category_name)
+        published_date = datetime.strptime(article['published_date'], "%Y-%m-%d").date()
+        in_range = not ((start_date and published_date < start_date) or (end_date and published_date > end_date))
+    articles_total.inc(source_type, category_name, "kept" if in_range else "out_of_range")
+    return article if in_range else None
+
+def article_failed(link, source_type, category_name, error):
+    articles_total.inc(source_type, category_name, "failed")
+    logs.warning("article_failed", source=source_type, category=category_name, url=link, error=str(error))
+
+def parse_since(value):
+    # Unix timestamp or ISO 8601 datetime (naive means UTC)
+    if value in (None, ''):
+        return None
+    try:
+        since = float(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        if not math.isfinite(since):
+            raise ValueError(f"Invalid since: {value}")
+        return since
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid since: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def parse_bounded(value, name, default, maximum, cast=int):
+    # A positive number no larger than maximum; default when missing
+    if value in (None, ''):
+        return default
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value}")
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"Invalid {name}: {value} (must be a positive number)")
+    return min(number, maximum)
+
+def parse_offset(value):
+    # Index into a job's results; 0 when missing
+    try:
+        offset = int(value or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid offset: {value}")
+    if offset < 0:
+        raise ValueError(f"Invalid offset: {value} (must not be negative)")
+    return offset
+
+def parse_date_range(start_date_input, end_date_input):
+    try:
+        start_date = datetime.strptime(start_date_input, "%Y-%m-%d").date() if start_date_input else None
+        end_date = datetime.strptime(end_date_input, "%Y-%m-%d").date() if end_date_input else datetime.today().date()
+    except:
+        start_date = None
+        end_date = datetime.today().date()
+    return start_date, end_date
+
+@app.route('/', methods=['GET', 'POST'])
+def index():
+    articles = None
+    category = None
+    start_date = None
+    end_date = None
+    search_performed = False
+    job_id = None
+
+    current_utc = "2025-04-22 12:34:01"
+    user_login = "Lokesh-172"
+
+    if request.method == 'POST':
+        category = request.form.get('category')
+        start_date_input = request.form.get('start_date')
+        end_date_input = request.form.get('end_date')
+        search_performed = True
+
+        start_date, end_date = parse_date_range(start_date_input, end_date_input)
+        if category in categories:
+            # Render what the search has found so far; main.js polls
+            # /api/jobs/<id> for the rest instead of holding this request open
+            job, _ = submit_search(category, start_date=start_date, end_date=end_date)
+            snapshot = job.to_dict()
+            articles = snapshot['articles']
+            if snapshot['status'] in ("queued", "running"):
+                job_id = job.id
+
+    return render_template('index.html', 
+                           articles=articles, 
+                           category=category,
+                           categories=categories,
+                           sources=registry.sources.values(),
+                           start_date=start_date, 
+                           end_date=end_date,
+                           search_performed=search_performed,
+                           job_id=job_id,
+                           current_utc=current_utc,
+                           user_login=user_login)
+
+@app.route('/api/articles', methods=['GET', 'POST'])
+def api_articles():
+    params = request.get_json(silent=True) or {}
+    if request.method == 'GET' or not params:
+        params = {
+            'categories': request.values.getlist('category'),
+            'start_date': request.values.get('start_date'),
+            'end_date': request.values.get('end_date'),
+            'max_articles': request.values.get('max_articles'),
+            'budget': request.values.get('budget'),
+            'since': request.values.get('since'),
+        }
+
+    names = params.get('categories') or []
+    if isinstance(names, str):
+        names = [names]
+    try:
+        if not isinstance(names, list):
+            raise ValueError(f"Invalid categories: {names!r} (must be a name or a list of names)")
+        category_names = expand_categories(names)
+        max_articles = parse_bounded(params.get('max_articles'), 'max_articles', 10, MAX_ARTICLES_LIMIT)
+        budget = parse_bounded(params.get('budget'), 'budget', FANOUT_BUDGET, MAX_FANOUT_BUDGET, float)
+        since = parse_since(params.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not category_names:
+        return jsonify({'error': 'No categories requested'}), 400
+
+    start_date, end_date = parse_date_range(params.get('start_date'), params.get('end_date'))
+    articles, status = get_articles_for(category_names, max_articles, start_date, end_date, budget, since)
+    return jsonify({
+        'articles': articles,
+        'count': len(articles),
+        'categories': status,
+        'start_date': start_date.strftime("%Y-%m-%d") if start_date else None,
+        'end_date': end_date.strftime("%Y-%m-%d") if end_date else None,
+        'since': since,
+    })
+
+def source_names(values):
+    # Source ids ('bbc') or names ('BBC News') to the names stored on articles
+    names = []
+    for value in values:
+        if value in registry.sources:
+            names.append(registry.sources[value].name)
+        elif any(source.name == value for source in registry.sources.values()):
+            names.append(value)
+        else:
+            raise ValueError(f"No such source: {value}")
+    return names
+
+@app.route('/api/search')
+def api_search():
+    # Answered from the local index only; never fetches
+    started = time.perf_counter()
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'No search terms'}), 400
+    try:
+        sources = source_names(request.args.getlist('source'))
+        category_names = expand_categories(request.args.getlist('category'))
+        limit = parse_bounded(request.args.get('limit'), 'limit', 20, 200)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    start_date, end_date = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+    articles = get_store().search(text, start_date, end_date, sources, category_names, limit)
+    return jsonify({
+        'query': text,
+        'articles': articles,
+        'count': len(articles),
+        'start_date': start_date.strftime("%Y-%m-%d") if start_date else None,
+        'end_date': end_date.strftime("%Y-%m-%d") if end_date else None,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2),
+    })
+
+@register_collector
+def collect_fetch_stats():
+    connections = []
+    for host, stats in connection_stats().items():
+        connections.append(({"host": host, "kind": "opened"}, stats["opened"]))
+        connections.append(({"host": host, "kind": "reused"}, stats["reused"]))
+    cache = [({"result": result}, count) for result, count in sorted(get_cache().stats.items())]
+    hints = []
+    for source_type, stats in sorted(hint_stats.items()):
+        hints.append(({"source": source_type, "kind": "candidates"}, stats["candidates"]))
+        hints.append(({"source": source_type, "kind": "skipped"}, stats["skipped"]))
+    return (
+        sample_lines("news_http_connections_total", "counter", "Pooled connections opened vs reused per host.", connections)
+        + sample_lines("news_http_cache_total", "counter", "Response cache lookups and writes by result.", cache)
+        + sample_lines("news_date_hint_total", "counter", "Listing candidates seen and skipped by date hints.", hints)
+    )
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(expose(), mimetype='text/plain; version=0.0.4')
+
+def article_events(job, offset=0):
+    count = 0
+    if job is not None:
+        for article in job.follow(offset):
+            count += 1
+            yield f"event: article\ndata: {json.dumps(article)}\n\n"
+    done = {'count': count}
+    if job is not None and job.error:
+        done['error'] = job.error
+    yield f"event: done\ndata: {json.dumps(done)}\n\n"
+
+def event_stream(events):
+    return Response(stream_with_context(events), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/stream')
+def stream():
+    category = request.args.get('category')
+    start_date, end_date = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+    job = None
+    if category in categories:
+        job, _ = submit_search(category, start_date=start_date, end_date=end_date)
+    return event_stream(article_events(job))
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    # Returns at once with a job id; results are polled from /api/jobs/<id>
+    # or streamed from /api/jobs/<id>/stream while the scrape runs
+    params = request.get_json(silent=True) or request.form
+    category = params.get('category')
+    if not isinstance(category, str) or category not in categories:
+        return jsonify({'error': f"No such category: {category}"}), 400
+    try:
+        max_articles = parse_bounded(params.get('max_articles'), 'max_articles', 10, MAX_ARTICLES_LIMIT)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    start_date, end_date = parse_date_range(params.get('start_date'), params.get('end_date'))
+    job, coalesced = submit_search(category, max_articles, start_date, end_date)
+    body = dict(job.to_dict(), coalesced=coalesced)
+    return jsonify(body), 202, {'Location': url_for('api_job', job_id=job.id)}
+
+@app.route('/api/jobs/<job_id>')
+def api_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f"No such job: {job_id}"}), 404
+    try:
+        offset = parse_offset(request.args.get('offset'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(job.to_dict(offset))
+
+@app.route('/api/jobs/<job_id>/stream')
+def api_job_stream(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f"No such job: {job_id}"}), 404
+    try:
+        offset = parse_offset(request.args.get('offset'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return event_stream(article_events(job, offset))
+
+scheduler = CrawlScheduler(categories, crawl_category, get_source_type,
+                           intervals=registry.crawl_intervals(), concurrency=registry.crawl_concurrency())
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['export']:
+        import export
+        export.main(sys.argv[2:], expand_categories, crawl_category)
+        sys.exit()
+    # With the reloader on, only the child process that serves requests crawls
+    if settings.BACKGROUND_CRAWL and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        scheduler.start()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,366 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    headline TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    published_date TEXT NOT NULL,
+    source TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS article_categories (
+    category TEXT NOT NULL,
+    url TEXT NOT NULL REFERENCES articles (url),
+    published_date TEXT NOT NULL,
+    PRIMARY KEY (category, url)
+);
+CREATE INDEX IF NOT EXISTS article_categories_date
+    ON article_categories (category, published_date);
+CREATE TABLE IF NOT EXISTS crawls (
+    category TEXT PRIMARY KEY,
+    crawled_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    category TEXT NOT NULL,
+    url TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (category, url)
+);
+CREATE INDEX IF NOT EXISTS frontier_first_seen
+    ON frontier (category, first_seen);
+CREATE TABLE IF NOT EXISTS seen_urls (
+    url_hash INTEGER PRIMARY KEY,
+    outcome TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Full-text index over headline and summary, kept in step with articles by
+# triggers. Porter stemming lets "elections" match "election".
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE articles_fts USING fts5(
+    headline, summary, content='articles', tokenize='porter unicode61'
+);
+CREATE TRIGGER articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, headline, summary) VALUES (new.rowid, new.headline, new.summary);
+END;
+CREATE TRIGGER articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, summary)
+        VALUES ('delete', old.rowid, old.headline, old.summary);
+END;
+CREATE TRIGGER articles_fts_update AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, summary)
+        VALUES ('delete', old.rowid, old.headline, old.summary);
+    INSERT INTO articles_fts (rowid, headline, summary) VALUES (new.rowid, new.headline, new.summary);
+END;
+INSERT INTO articles_fts (articles_fts) VALUES ('rebuild');
+"""
+
+# Headline matches count for more than summary matches when ranking
+HEADLINE_WEIGHT = 5.0
+SEARCH_TERM_RE = re.compile(r'\w+\*?')
+
+
+def url_hash(url):
+    # 64-bit key; a collision only means one page is skipped until its entry expires
+    return int.from_bytes(hashlib.sha1(url.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+def row_to_article(row):
+    url, headline, summary, published, source = row
+    return {
+        'headline': headline,
+        'summary': summary,
+        'link': url,
+        'published_date': published,
+        'formatted_date': datetime.strptime(published, "%Y-%m-%d").strftime("%B %d, %Y"),
+        'source': source
+    }
+
+
+class ArticleStore:
+    """Parsed articles keyed by URL, indexed by (category, published_date)."""
+
+    def __init__(self, path=settings.ARTICLE_STORE_PATH):
+        self.path = path
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        self.has_fts = self.create_fts(conn)
+
+    def create_fts(self, conn):
+        # Created (and filled from existing articles) once; search falls back
+        # to a slower LIKE scan where SQLite is built without FTS5
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            conn.executescript("BEGIN;" + FTS_SCHEMA + "COMMIT;")
+        except sqlite3.OperationalError:
+            conn.rollback()
+            return False
+        return True
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def save(self, article, category):
+        with self.write_lock:
+            conn = self.connection()
+            # An upsert rather than INSERT OR REPLACE, so the full-text index
+            # triggers see an update instead of a silent delete
+            conn.execute(
+                "INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET "
+                "headline = excluded.headline, summary = excluded.summary, "
+                "published_date = excluded.published_date, source = excluded.source, fetched_at = excluded.fetched_at",
+                (article['link'], article['headline'], article['summary'],
+                 article['published_date'], article['source'], time.time())
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO article_categories VALUES (?, ?, ?)",
+                (category, article['link'], article['published_date'])
+            )
+            conn.commit()
+
+    def update_frontier(self, category, urls, when=None):
+        """Record urls as listed under category; return the ones listed for the first time.
+
+        Entries not listed again within FRONTIER_TTL are dropped, as are
+        expired seen-url marks.
+        """
+        urls = list(dict.fromkeys(urls))
+        if when is None:
+            when = time.time()
+        conn = self.connection()
+        listed = set()
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            listed.update(url for (url,) in conn.execute(
+                f"SELECT url FROM frontier WHERE category = ? AND url IN ({placeholders})", [category] + chunk
+            ))
+        with self.write_lock:
+            conn.executemany(
+                "INSERT INTO frontier VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (category, url) DO UPDATE SET last_seen = excluded.last_seen",
+                [(category, url, when, when) for url in urls]
+            )
+            conn.execute(
+                "DELETE FROM frontier WHERE category = ? AND last_seen < ?",
+                (category, when - settings.FRONTIER_TTL)
+            )
+            conn.execute("DELETE FROM seen_urls WHERE expires_at <= ?", (when,))
+            conn.commit()
+        return [url for url in urls if url not in listed]
+
+    def mark_seen(self, url, outcome, ttl=settings.SEEN_URL_TTL):
+        """Remember a url that yielded no article so it isn't fetched again for ttl seconds."""
+        with self.write_lock:
+            conn = self.connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO seen_urls VALUES (?, ?, ?)",
+                (url_hash(url), outcome, time.time() + ttl)
+            )
+            conn.commit()
+
+    def seen_urls(self, urls):
+        """The subset of urls marked seen whose entry hasn't expired."""
+        hashes = {url_hash(url): url for url in urls}
+        keys = list(hashes)
+        conn = self.connection()
+        now = time.time()
+        seen = set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            seen.update(hashes[key] for (key,) in conn.execute(
+                f"SELECT url_hash FROM seen_urls WHERE expires_at > ? AND url_hash IN ({placeholders})",
+                [now] + chunk
+            ))
+        return seen
+
+    def new_urls(self, urls, category):
+        """Return the urls not yet stored or seen, filing the known ones under category."""
+        urls = list(urls)
+        if not urls:
+            return []
+        conn = self.connection()
+        known = {}
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            known.update(conn.execute(
+                f"SELECT url, published_date FROM articles WHERE url IN ({placeholders})", chunk
+            ).fetchall())
+        if known:
+            with self.write_lock:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO article_categories VALUES (?, ?, ?)",
+                    [(category, url, published) for url, published in known.items()]
+                )
+                conn.commit()
+        seen = self.seen_urls([url for url in urls if url not in known])
+        return [url for url in urls if url not in known and url not in seen]
+
+    def query(self, category, start_date=None, end_date=None, limit=None, since=None):
+        """Stored articles in category, newest first.
+
+        With since (a Unix timestamp) only articles that first appeared on
+        the category's listing at or after that time are returned.
+        """
+        sql = ("SELECT a.url, a.headline, a.summary, a.published_date, a.source "
+               "FROM article_categories c JOIN articles a ON a.url = c.url ")
+        if since is not None:
+            sql += "LEFT JOIN frontier f ON f.category = c.category AND f.url = c.url "
+        sql += "WHERE c.category = ?"
+        params = [category]
+        if since is not None:
+            # Articles stored before the frontier existed fall back to their fetch time
+            sql += " AND COALESCE(f.first_seen, a.fetched_at) >= ?"
+            params.append(since)
+        if start_date:
+            sql += " AND c.published_date >= ?"
+            params.append(start_date.strftime("%Y-%m-%d"))
+        if end_date:
+            sql += " AND c.published_date <= ?"
+            params.append(end_date.strftime("%Y-%m-%d"))
+        sql += " ORDER BY c.published_date DESC, a.fetched_at DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row_to_article(row) for row in self.connection().execute(sql, params)]
+
+    def search(self, text, start_date=None, end_date=None, sources=None, categories=None, limit=20):
+        """Stored articles matching every word of text, best matches first.
+
+        A word ending in * matches as a prefix. sources are source names as
+        stored on articles ('BBC News'); categories restrict to articles
+        filed under any of them.
+        """
+        terms = SEARCH_TERM_RE.findall(text)
+        if not terms:
+            return []
+        params = []
+        if self.has_fts:
+            match = " ".join('"%s"%s' % (term.rstrip('*'), '*' if term.endswith('*') else '') for term in terms)
+            sql = ("SELECT a.url, a.headline, a.summary, a.published_date, a.source "
+                   "FROM articles_fts JOIN articles a ON a.rowid = articles_fts.rowid "
+                   "WHERE articles_fts MATCH ?")
+            params.append(match)
+        else:
+            sql = ("SELECT a.url, a.headline, a.summary, a.published_date, a.source "
+                   "FROM articles a WHERE 1")
+            for term in terms:
+                sql += " AND (a.headline LIKE ? OR a.summary LIKE ?)"
+                pattern = "%" + term.rstrip('*') + "%"
+                params.extend([pattern, pattern])
+        if start_date:
+            sql += " AND a.published_date >= ?"
+            params.append(start_date.strftime("%Y-%m-%d"))
+        if end_date:
+            sql += " AND a.published_date <= ?"
+            params.append(end_date.strftime("%Y-%m-%d"))
+        if sources:
+            sql += f" AND a.source IN ({','.join('?' * len(sources))})"
+            params.extend(sources)
+        if categories:
+            sql += (" AND EXISTS (SELECT 1 FROM article_categories c WHERE c.url = a.url "
+                    f"AND c.category IN ({','.join('?' * len(categories))}))")
+            params.extend(categories)
+        if self.has_fts:
+            sql += f" ORDER BY bm25(articles_fts, {HEADLINE_WEIGHT}, 1.0), a.published_date DESC"
+        else:
+            sql += " ORDER BY a.published_date DESC"
+        sql += " LIMIT ?"
+        params.append(limit)
+        return [row_to_article(row) for row in self.connection().execute(sql, params)]
+
+    def iter_export(self, categories, start_date=None, end_date=None):
+        """Yield every article filed under any of categories, one dict at a time.
+
+        Rows come ordered by source then published date and are read from
+        the cursor as they're consumed, so exports of any size run in
+        constant memory. 'categories' lists every requested category the
+        article is filed under.
+        """
+        placeholders = ",".join("?" * len(categories))
+        sql = ("SELECT a.url, a.headline, a.summary, a.published_date, a.source, a.fetched_at, "
+               "group_concat(c.category, char(31)) "
+               "FROM articles a JOIN article_categories c ON c.url = a.url "
+               f"WHERE c.category IN ({placeholders})")
+        params = list(categories)
+        if start_date:
+            sql += " AND a.published_date >= ?"
+            params.append(start_date.strftime("%Y-%m-%d"))
+        if end_date:
+            sql += " AND a.published_date <= ?"
+            params.append(end_date.strftime("%Y-%m-%d"))
+        sql += " GROUP BY a.url ORDER BY a.source, a.published_date, a.url"
+        # A connection of its own so a long export doesn't hold a read
+        # transaction open on the connection this thread uses for writes
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            for url, headline, summary, published, source, fetched_at, filed in conn.execute(sql, params):
+                yield {
+                    'source': source,
+                    'published_date': published,
+                    'headline': headline,
+                    'summary': summary,
+                    'link': url,
+                    'categories': sorted(filed.split(chr(31))),
+                    'fetched_at': fetched_at,
+                }
+        finally:
+            conn.close()
+
+    def mark_crawled(self, category, when=None):
+        if when is None:
+            when = time.time()
+        with self.write_lock:
+            conn = self.connection()
+            conn.execute("INSERT OR REPLACE INTO crawls VALUES (?, ?)", (category, when))
+            conn.commit()
+
+    def last_crawled(self, category):
+        row = self.connection().execute(
+            "SELECT crawled_at FROM crawls WHERE category = ?", (category,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, category, max_age=settings.LISTING_FRESH_SECONDS):
+        crawled_at = self.last_crawled(category)
+        return crawled_at is not None and time.time() - crawled_at < max_age
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+        return _store
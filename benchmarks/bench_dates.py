@@ -0,0 +1,52 @@
+"""Micro-benchmark for dates.extract_published_date on saved fixture pages.
+
+Each fixture is timed as saved and with its JSON-LD blocks removed, which
+forces the selector scan, so both paths are covered. Pages are parsed once
+up front; only extraction is timed.
+
+    python benchmarks/bench_dates.py [--repeat N] [--fixtures DIR]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dates import extract_published_date  # noqa: E402
+from parsing import parse_article  # noqa: E402
+from sources import get_registry  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+JSONLD_RE = re.compile(r'<script type="application/ld\+json">.*?</script>', re.S)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    args = parser.parse_args()
+
+    print(f"{'source':<10} {'variant':<10} {'date':<12} {'us/article':>11}")
+    for source_type, source in get_registry().sources.items():
+        path = os.path.join(args.fixtures, f"{source_type}_article.html")
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            markup = f.read()
+
+        for variant, html in [("json-ld", markup), ("selectors", JSONLD_RE.sub("", markup))]:
+            for targeted in (False, True):
+                soup = parse_article(html, source_type, targeted=targeted)
+                url = "https://example.com/fixture"
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    found = extract_published_date(soup, url, source.date_rules)
+                elapsed_us = (time.perf_counter() - start) * 1e6 / args.repeat
+                label = variant + (" (t)" if targeted else "")
+                print(f"{source_type:<10} {label:<10} {str(found):<12} {elapsed_us:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare article parsing cost across parser backends and targeted mode.
+
+Runs every extractor over the saved fixture pages with the original
+html.parser full-tree path, lxml full-tree and lxml targeted, reporting CPU
+time and peak traced memory per article and checking the extracted fields
+agree with the original path. Small inline pages (EDGE_CASES) exercise
+extraction rules the fixtures don't.
+
+    python benchmarks/bench_parsing.py [--repeat N] [--fixtures DIR]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parsing  # noqa: E402
+from bs4 import BeautifulSoup  # noqa: E402
+from extraction import extract_article  # noqa: E402
+from sources import get_registry  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+# (source, name, markup): pages whose fields targeted parsing once got wrong
+EDGE_CASES = [
+    ("hindu", "footer paragraph", """<html><head><title>Story - The Hindu</title>
+<script type="application/ld+json">{"datePublished": "2025-04-12T08:00:00+05:30"}</script></head>
+<body><h1>Water talks resume</h1>
+<div class="site-footer"><p>Subscribe to our newsletter for the latest stories every morning.</p></div>
+<div class="body"><p>The two States resumed talks on sharing river water on Saturday.</p></div>
+</body></html>"""),
+]
+
+
+def baseline(markup, source_type):
+    return BeautifulSoup(markup, 'html.parser')
+
+
+def lxml_full(markup, source_type):
+    return BeautifulSoup(markup, 'lxml')
+
+
+def lxml_targeted(markup, source_type):
+    return BeautifulSoup(markup, 'lxml', parse_only=parsing.article_strainer(source_type))
+
+
+MODES = [
+    ("html.parser (current)", baseline),
+    ("lxml full", lxml_full),
+    ("lxml targeted", lxml_targeted),
+]
+
+
+def measure(parse, extract, markup, source_type, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        article = extract(parse(markup, source_type), "https://example.com/fixture")
+    cpu_ms = (time.process_time() - start) * 1000 / repeat
+
+    tracemalloc.start()
+    extract(parse(markup, source_type), "https://example.com/fixture")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return article, cpu_ms, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    args = parser.parse_args()
+
+    if not parsing.HAVE_LXML:
+        print("lxml is not installed; lxml modes fall back to html.parser")
+
+    print(f"{'page':<26} {'mode':<22} {'cpu ms/article':>15} {'peak KiB':>10}  fields match")
+    for source_type, source in get_registry().sources.items():
+        def extract(soup, link, source=source):
+            return extract_article(source, soup, link)
+
+        pages = [(f"{source_type} ({name})", case) for case_source, name, case in EDGE_CASES
+                 if case_source == source_type]
+        path = os.path.join(args.fixtures, f"{source_type}_article.html")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                pages.insert(0, (source_type, f.read()))
+        for label, markup in pages:
+            reference = None
+            for name, parse in MODES:
+                article, cpu_ms, peak_kib = measure(parse, extract, markup, source_type, args.repeat)
+                if reference is None:
+                    reference = article
+                matches = "yes" if article == reference else "NO"
+                print(f"{label:<26} {name:<22} {cpu_ms:>15.2f} {peak_kib:>10.0f}  {matches}")
+
+
+if __name__ == "__main__":
+    main()
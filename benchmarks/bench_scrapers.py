@@ -0,0 +1,213 @@
+"""End-to-end scraper benchmark against a local replay of recorded pages.
+
+Crawls every category whose listing page is in the archive with
+app.iter_category, the crawl behind get_articles and the scheduler, with all
+requests served by replay.ReplayServer, and reports per source: articles/sec,
+p50/p95 fetch latency up to the last byte read, CPU time spent parsing and
+extracting vs wall time spent waiting on the network, and the process's peak
+RSS.
+
+Record an archive from the live sites first:
+
+    NEWS_RECORD_DIR=benchmarks/archive python app.py    # then run some searches
+
+and replay it:
+
+    python benchmarks/bench_scrapers.py --archive benchmarks/archive --latency 0.08 --jitter 0.05
+
+Without --archive a small synthetic archive is built from benchmarks/fixtures.
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+# Keep the benchmark's article store and HTTP cache away from the real ones
+os.environ["NEWS_DATA_DIR"] = tempfile.mkdtemp(prefix="news-bench-")
+os.environ["NEWS_BACKGROUND_CRAWL"] = "0"
+
+import app  # noqa: E402
+import fetcher  # noqa: E402
+from replay import Archive, ReplayServer, rewrite_to  # noqa: E402
+
+# Synthetic listings used when no recorded archive is given
+FIXTURE_LISTINGS = {
+    "bbc": ("BBC Politics", lambda i: f"/news/articles/c{i:04d}"),
+    "hindu": ("Hindu National", lambda i: f"/news/national/story-{i}/article{6800000 + i}.ece"),
+    "aljazeera": ("AlJazeera Middle East", lambda i: f"/news/2025/4/{i % 20 + 1}/story-{i}"),
+}
+
+
+def build_fixture_archive(path, articles_per_source=30):
+    archive = Archive(path)
+    headers = {"Content-Type": "text/html; charset=utf-8"}
+    for source_type, (category, make_path) in FIXTURE_LISTINGS.items():
+        fixture = os.path.join(FIXTURES, f"{source_type}_article.html")
+        if not os.path.exists(fixture):
+            continue
+        with open(fixture, encoding="utf-8") as f:
+            page = f.read()
+        listing_url = app.categories[category]
+        base = "{0.scheme}://{0.netloc}".format(urlsplit(listing_url))
+
+        links = []
+        for i in range(articles_per_source):
+            path_ = make_path(i)
+            links.append(f'<article class="gc gc--type-post"><a href="{path_}">Story {i}</a></article>')
+            body = page.replace("<h1", f"<h1 data-story=\"{i}\"", 1).replace("</h1>", f" ({i})</h1>", 1)
+            archive.save(base + path_, 200, headers, body.encode("utf-8"))
+        listing = f"<html><body><main>{''.join(links)}</main></body></html>"
+        archive.save(listing_url, 200, headers, listing.encode("utf-8"))
+    return archive
+
+
+class Probe:
+    """Collects fetch latencies and parse CPU time per source."""
+
+    def __init__(self, hosts):
+        self.hosts = hosts
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.parse_cpu = {}
+        self.wait = {}
+
+    def add(self, table, source_type, value):
+        with self.lock:
+            table.setdefault(source_type, []).append(value)
+
+    def wrap_session(self, session):
+        get = session.get
+
+        def timed_get(url, *args, **kwargs):
+            started = time.perf_counter()
+            host = urlsplit(url).path.lstrip("/").split("/", 1)[0]
+            source_type = self.hosts.get(host, "unknown")
+            try:
+                response = get(url, *args, **kwargs)
+            except Exception:
+                self.add(self.latencies, source_type, time.perf_counter() - started)
+                raise
+            elapsed = time.perf_counter() - started
+            if not kwargs.get("stream"):
+                self.add(self.latencies, source_type, elapsed)
+                return response
+            # A streamed body is read after get() returns, between the parses
+            # fetch_partial runs on it: count only the time spent reading
+            # chunks, and record the total when the response is closed
+            reading = [elapsed]
+            iter_content, close = response.iter_content, response.close
+
+            def timed_iter_content(*args, **kwargs):
+                chunks = iter_content(*args, **kwargs)
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        chunk = next(chunks)
+                    except StopIteration:
+                        return
+                    finally:
+                        reading[0] += time.perf_counter() - started
+                    yield chunk
+
+            def timed_close():
+                response.close = close
+                close()
+                self.add(self.latencies, source_type, reading[0])
+
+            response.iter_content = timed_iter_content
+            response.close = timed_close
+            return response
+
+        session.get = timed_get
+
+    def wrap_cpu(self, module, name, source_arg):
+        func = getattr(module, name)
+
+        def timed(*args, **kwargs):
+            started = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(self.parse_cpu, source_arg(args), time.thread_time() - started)
+
+        setattr(module, name, timed)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archive", help="recorded archive directory (default: synthetic from fixtures)")
+    parser.add_argument("--latency", type=float, default=0.05, help="base response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="extra random delay up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--max-articles", type=int, default=10)
+    parser.add_argument("--respect-limits", action="store_true",
+                        help="keep the configured per-source rate limits instead of lifting them")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    archive = Archive(args.archive) if args.archive else build_fixture_archive(tempfile.mkdtemp(prefix="news-archive-"))
+    recorded = set(archive.urls())
+    wanted = [name for name, url in app.categories.items() if url in recorded]
+    if not wanted:
+        print("No recorded listing pages in the archive")
+        return
+
+    server = ReplayServer(archive, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, seed=args.seed).start()
+    fetcher.URL_REWRITE = rewrite_to(server.base_url)
+    fetcher.CACHE_ENABLED = False
+    if not args.respect_limits:
+        for source_type in fetcher.SOURCE_LIMITS:
+            fetcher.configure_source(source_type, requests_per_second=1000, burst=1000)
+
+    hosts = {urlsplit(url).netloc: app.get_source_type(name) for name, url in app.categories.items()}
+    probe = Probe(hosts)
+    probe.wrap_session(fetcher.get_session())
+    probe.wrap_cpu(app, "parse_html", lambda a: a[1] if len(a) > 1 else "unknown")
+    probe.wrap_cpu(app, "parse_article", lambda a: a[1])
+    probe.wrap_cpu(app, "extract_article", lambda a: a[0].id)
+    probe.wrap_cpu(app, "extract_article_head", lambda a: a[0].id)
+
+    results = {}
+    for name in wanted:
+        source_type = app.get_source_type(name)
+        started = time.perf_counter()
+        count = sum(1 for _ in app.iter_category(name, args.max_articles))
+        elapsed = time.perf_counter() - started
+        entry = results.setdefault(source_type, {"articles": 0, "wall": 0.0, "categories": 0})
+        entry["articles"] += count
+        entry["wall"] += elapsed
+        entry["categories"] += 1
+    server.stop()
+
+    peak_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{'source':<10} {'cats':>4} {'articles':>8} {'art/s':>7} {'p50 ms':>7} {'p95 ms':>7} "
+          f"{'parse cpu s':>11} {'wait s':>7}")
+    for source_type, entry in results.items():
+        latencies = sorted(probe.latencies.get(source_type, []))
+        rate = entry["articles"] / entry["wall"] if entry["wall"] else 0.0
+        print(f"{source_type:<10} {entry['categories']:>4} {entry['articles']:>8} {rate:>7.1f} "
+              f"{percentile(latencies, 50) * 1000:>7.1f} {percentile(latencies, 95) * 1000:>7.1f} "
+              f"{sum(probe.parse_cpu.get(source_type, [])):>11.2f} {sum(latencies):>7.2f}")
+    print(f"replay: {server.stats}  peak RSS: {peak_rss_mib:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import heapq
+import queue
+import random
+import threading
+import time
+
+import logs
+import settings
+
+
+class CrawlScheduler:
+    """Periodically crawls every category in the background.
+
+    A single scheduler thread pushes due categories onto a work queue per
+    source; each source has its own small pool of worker threads so a slow
+    publisher can't hold up crawls of the others.
+    """
+
+    def __init__(self, categories, crawl, source_of, intervals=None, jitter=None, concurrency=None):
+        self.categories = list(categories)
+        self.crawl = crawl
+        self.source_of = source_of
+        self.intervals = intervals or {}
+        self.jitter = settings.CRAWL_JITTER if jitter is None else jitter
+        self.concurrency = concurrency or {}
+        self.queues = {}
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.heap = []
+        self.status = {}
+
+    def interval_for(self, category):
+        return self.intervals.get(self.source_of(category), settings.CRAWL_INTERVAL)
+
+    def next_delay(self, category):
+        interval = self.interval_for(category)
+        return interval + random.uniform(-self.jitter, self.jitter) * interval
+
+    def start(self):
+        if self.threads:
+            return
+        now = time.time()
+        for category in self.categories:
+            source = self.source_of(category)
+            if source not in self.queues:
+                self.queues[source] = queue.Queue()
+            # Spread the first round out instead of crawling everything at once
+            first_run = now + random.uniform(0, self.jitter * self.interval_for(category))
+            heapq.heappush(self.heap, (first_run, category))
+            self.status[category] = {"last_run": None, "next_run": first_run, "last_error": None, "runs": 0}
+
+        self.threads.append(threading.Thread(target=self.schedule_loop, name="crawl-scheduler", daemon=True))
+        for source in self.queues:
+            for i in range(max(1, self.concurrency.get(source, settings.CRAWL_CONCURRENCY))):
+                self.threads.append(threading.Thread(
+                    target=self.worker, args=(source,), name=f"crawl-{source}-{i}", daemon=True
+                ))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=5):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def enqueue(self, category):
+        """Queue a crawl of category now unless one is already queued or running."""
+        with self.lock:
+            if category in self.pending:
+                return False
+            self.pending.add(category)
+        self.queues[self.source_of(category)].put(category)
+        return True
+
+    def schedule_loop(self):
+        while not self.stop_event.is_set():
+            with self.lock:
+                due_at, category = self.heap[0]
+            delay = due_at - time.time()
+            if delay > 0:
+                self.stop_event.wait(min(delay, 1))
+                continue
+            with self.lock:
+                heapq.heappop(self.heap)
+                next_run = time.time() + self.next_delay(category)
+                heapq.heappush(self.heap, (next_run, category))
+                self.status[category]["next_run"] = next_run
+            self.enqueue(category)
+
+    def worker(self, source):
+        work = self.queues[source]
+        while not self.stop_event.is_set():
+            try:
+                category = work.get(timeout=1)
+            except queue.Empty:
+                continue
+            error = None
+            try:
+                self.crawl(category)
+            except Exception as e:
+                error = str(e)
+                logs.error("background_crawl_failed", category=category, error=error)
+            finally:
+                with self.lock:
+                    self.pending.discard(category)
+                    entry = self.status[category]
+                    entry["last_run"] = time.time()
+                    entry["last_error"] = error
+                    entry["runs"] += 1
+                work.task_done()
@@ -0,0 +1,290 @@
+import calendar
+import json
+import re
+import threading
+from datetime import date, timedelta
+
+# Dates carried in article URLs, e.g. Hindu /2025/04/15/ and Al Jazeera
+# /news/2025/4/15/slug. A year/month-only path narrows to that month.
+URL_DAY_RE = re.compile(r'/(20\d{2})/(\d{1,2})/(\d{1,2})(?:/|$)')
+URL_MONTH_RE = re.compile(r'/(20\d{2})/(\d{1,2})(?:/|$)')
+
+# Listing and URL dates can differ from the article's own date by a day
+# around midnight in the publisher's timezone
+HINT_SLACK = timedelta(days=1)
+
+# Per-source counts of listing candidates and fetches avoided by date hints
+hint_stats = {}
+_hint_stats_lock = threading.Lock()
+
+
+def url_date_range(url):
+    match = URL_DAY_RE.search(url)
+    if match:
+        try:
+            day = date(*map(int, match.groups()))
+            return day, day
+        except ValueError:
+            pass
+    match = URL_MONTH_RE.search(url)
+    if match:
+        year, month = map(int, match.groups())
+        if 1 <= month <= 12:
+            return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+    return None
+
+
+def listing_date_range(tag, levels=3):
+    """Date from a <time datetime> next to a listing link, if unambiguous.
+
+    Walks up at most `levels` ancestors of the link and stops as soon as an
+    ancestor holds more than one link, since a time found there may belong
+    to a neighbouring story.
+    """
+    node = tag
+    for _ in range(levels + 1):
+        if node is None or not hasattr(node, 'find'):
+            return None
+        time_tag = node.find('time', attrs={'datetime': True}) if node.name != 'time' else node
+        if time_tag:
+            try:
+                day = date.fromisoformat(time_tag['datetime'][:10])
+                return day, day
+            except ValueError:
+                return None
+        node = node.parent
+        if node is not None and len(node.find_all('a', href=True, limit=2)) > 1:
+            return None
+    return None
+
+
+def date_hint(url, tag=None):
+    # A full date in the URL beats the listing, which beats a month-only URL
+    if URL_DAY_RE.search(url):
+        hint = url_date_range(url)
+        if hint:
+            return hint
+    if tag is not None:
+        hint = listing_date_range(tag)
+        if hint:
+            return hint
+    return url_date_range(url)
+
+
+def hint_overlaps(hint, start_date, end_date):
+    earliest, latest = hint
+    if start_date and latest + HINT_SLACK < start_date:
+        return False
+    if end_date and earliest - HINT_SLACK > end_date:
+        return False
+    return True
+
+
+def plan_fetches(source_type, urls, hints, start_date=None, end_date=None):
+    """Order candidate urls for fetching using their date hints.
+
+    Candidates whose hint lies outside the requested range are dropped,
+    those hinted inside it go first (newest first) and those without a hint
+    follow in listing order.
+    """
+    if not start_date and not end_date:
+        return list(urls)
+
+    hinted, unknown, skipped = [], [], 0
+    for url in urls:
+        hint = hints.get(url)
+        if hint is None:
+            unknown.append(url)
+        elif hint_overlaps(hint, start_date, end_date):
+            hinted.append((hint[1], url))
+        else:
+            skipped += 1
+    hinted.sort(key=lambda item: item[0], reverse=True)
+
+    with _hint_stats_lock:
+        entry = hint_stats.setdefault(source_type, {"candidates": 0, "skipped": 0})
+        entry["candidates"] += len(urls)
+        entry["skipped"] += skipped
+    return [url for _, url in hinted] + unknown
+
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+MONTHS["sept"] = 9
+
+
+def month_number(name):
+    return MONTHS.get(name[:4].lower().rstrip('.')) or MONTHS.get(name[:3].lower())
+
+
+def from_day_month_year(match):
+    day, month, year = match.groups()
+    return date(int(year), month_number(month), int(day))
+
+
+def from_month_day_year(match):
+    month, day, year = match.groups()
+    return date(int(year), month_number(month), int(day))
+
+
+def from_numeric_dmy(match):
+    day, month, year = match.groups()
+    return date(int(year), int(month), int(day))
+
+
+def from_iso(match):
+    return date(*map(int, match.groups()))
+
+
+# Text date formats, tried in order on each candidate string
+TEXT_DATE_PATTERNS = [
+    (re.compile(r'\b([A-Za-z]{3,9})\.? (\d{1,2}), (\d{4})'), from_month_day_year),   # April 15, 2025
+    (re.compile(r'\b(\d{1,2}) ([A-Za-z]{3,9})\.? (\d{4})'), from_day_month_year),    # 15 April 2025, 15 Apr 2025
+    (re.compile(r'\b(\d{1,2})-([A-Za-z]{3,9})-(\d{4})'), from_day_month_year),        # 15-Apr-2025
+    (re.compile(r'\b(\d{2})/(\d{2})/(\d{4})'), from_numeric_dmy),                    # 15/04/2025
+    (re.compile(r'\b(\d{4})-(\d{2})-(\d{2})'), from_iso),                            # 2025-04-15
+]
+
+SIMPLE_SELECTOR_RE = re.compile(r'^(?:\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)="(?P<value>[^"]*)"\]|(?P<tag>[a-z][a-z0-9]*))$')
+
+
+def compile_date_rules(spec):
+    """Turn a source's date rules into lookup tables for a single tree pass.
+
+    JSON-LD fields are checked first, then the selectors in priority order
+    (datetime attribute, then text), then the URL if from_url is set. Only
+    simple selectors are supported: a tag name, .class and [attr="value"].
+    Each table maps to the selector's priority.
+    """
+    rules = {
+        "jsonld_fields": tuple(spec.get("jsonld_fields", ())),
+        "selectors": list(spec.get("selectors", ())),
+        "from_url": spec.get("from_url", False),
+        "tags": {},
+        "classes": {},
+        "attrs": {},
+    }
+    for priority, selector in enumerate(rules["selectors"]):
+        match = SIMPLE_SELECTOR_RE.match(selector)
+        if not match:
+            raise ValueError(f"Unsupported date selector: {selector}")
+        if match.group("cls"):
+            rules["classes"].setdefault(match.group("cls"), priority)
+        elif match.group("attr"):
+            rules["attrs"].setdefault((match.group("attr"), match.group("value")), priority)
+        else:
+            rules["tags"].setdefault(match.group("tag"), priority)
+    return rules
+
+
+def selector_priority(element, rules):
+    priority = rules["tags"].get(element.name)
+    classes = element.get('class') or ()
+    for cls in classes:
+        candidate = rules["classes"].get(cls)
+        if candidate is not None and (priority is None or candidate < priority):
+            priority = candidate
+    for (attr, value), candidate in rules["attrs"].items():
+        if element.get(attr) == value and (priority is None or candidate < priority):
+            priority = candidate
+    return priority
+
+
+def parse_iso_date(value):
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except (ValueError, AttributeError):
+        return None
+
+
+def parse_text_date(text):
+    for pattern, build in TEXT_DATE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            try:
+                return build(match)
+            except (ValueError, TypeError):
+                continue
+    return None
+
+
+def iter_jsonld_objects(data):
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_jsonld_objects(item)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from iter_jsonld_objects(data["@graph"])
+
+
+def date_from_jsonld(soup, fields):
+    for script in soup.find_all('script', attrs={'type': 'application/ld+json'}):
+        if not script.string:
+            continue
+        try:
+            data = json.loads(script.string)
+        except ValueError:
+            continue
+        for obj in iter_jsonld_objects(data):
+            for field in fields:
+                value = obj.get(field)
+                if isinstance(value, str):
+                    found = parse_iso_date(value)
+                    if found:
+                        return found
+    return None
+
+
+def date_from_elements(soup, rules):
+    # One pass over the tree; the element matching the highest-priority
+    # selector that yields a date wins
+    best, best_priority = None, len(rules["selectors"])
+    for element in soup.find_all(True):
+        priority = selector_priority(element, rules)
+        if priority is None or priority >= best_priority:
+            continue
+        found = None
+        if element.has_attr('datetime'):
+            found = parse_iso_date(element['datetime'])
+        if not found:
+            found = parse_text_date(element.get_text(" ", strip=True))
+        if found:
+            best, best_priority = found, priority
+            if priority == 0:
+                break
+    return best
+
+
+def extract_published_date(soup, url, rules):
+    """Publication date of an article page, or None if nothing matched.
+
+    rules come from compile_date_rules.
+    """
+    found = None
+    if rules["jsonld_fields"]:
+        found = date_from_jsonld(soup, rules["jsonld_fields"])
+    if not found:
+        found = date_from_elements(soup, rules)
+    if not found and rules["from_url"] and URL_DAY_RE.search(url):
+        hint = url_date_range(url)
+        found = hint[0] if hint else None
+    return found
+
+
+def prefix_published_date(soup, head_soup, rules):
+    """Publication date from the start of a page, or None to keep reading.
+
+    JSON-LD is checked first, as extract_published_date does, then the
+    page's <head> (head_soup), which is complete once it's closed. A body
+    element is only taken for sources without JSON-LD fields, and only if
+    it matches the top-priority selector: JSON-LD further down would beat
+    it, as would a better element for any lower-priority match.
+    """
+    found = None
+    if rules["jsonld_fields"]:
+        found = date_from_jsonld(soup, rules["jsonld_fields"])
+    if not found and head_soup is not None:
+        found = date_from_elements(head_soup, rules)
+    if not found and not rules["jsonld_fields"]:
+        found = date_from_elements(soup, dict(rules, selectors=rules["selectors"][:1]))
+    return found
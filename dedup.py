@@ -0,0 +1,129 @@
+import hashlib
+import re
+import struct
+from urllib.parse import urlsplit, urlunsplit
+
+# MinHash signature length and LSH banding: two stories become candidates
+# when all rows of any band agree, which catches ~90% of pairs at 0.7
+# Jaccard similarity and ~99% at 0.8 while rarely pairing unrelated ones.
+# Candidates are then confirmed against SIMILARITY_THRESHOLD; short news
+# texts that merely share boilerplate sit around 0.5-0.6.
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.7
+# Texts with fewer distinct words than this are too short to compare
+MIN_TOKENS = 4
+
+# Each word's NUM_PERM 32-bit hash values are cut from two 64-byte
+# BLAKE2b digests, which stand in for NUM_PERM independent hash functions
+HASH_VALUES = struct.Struct(f"<{NUM_PERM}I")
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have he her his in is it its of on or she that the their "
+    "they this to was were will with after over says said".split()
+)
+
+
+def canonical_url(url, keep_query=False):
+    """The URL an article should be fetched and stored under.
+
+    Drops the fragment, the query string (tracking parameters on all the
+    configured sources) unless keep_query, and AMP variants: an "amp" path
+    segment or a ".amp" suffix.
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment != 'amp']
+    path = '/'.join(segments)
+    if path.endswith('.amp'):
+        path = path[:-len('.amp')]
+    if parts.path.endswith('/') and not path.endswith('/'):
+        path += '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path or '/',
+                       parts.query if keep_query else '', ''))
+
+
+def url_key(url):
+    # Identity for de-duplication: scheme and trailing slash don't matter
+    parts = urlsplit(canonical_url(url))
+    return parts.netloc + (parts.path.rstrip('/') or '/')
+
+
+def tokens(text):
+    return {token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS}
+
+
+def word_hashes(word):
+    data = word.encode()
+    digest = hashlib.blake2b(data, digest_size=64).digest() + hashlib.blake2b(data, digest_size=64, person=b"minhash").digest()
+    return HASH_VALUES.unpack(digest)
+
+
+def minhash(words):
+    return tuple(map(min, zip(*map(word_hashes, words))))
+
+
+def similarity(signature, other):
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+
+
+def article_text(article):
+    return f"{article['headline']} {article['summary']}"
+
+
+def cluster(items, text=article_text, threshold=SIMILARITY_THRESHOLD):
+    """Group near-duplicate items; returns lists of indexes into items.
+
+    Each item is hashed once and only compared with the items sharing an
+    LSH band with it, so the cost grows roughly linearly with len(items).
+    Clusters and their members keep the input order.
+    """
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    buckets = {}
+    signatures = {}
+    for i, item in enumerate(items):
+        words = tokens(text(item))
+        if len(words) < MIN_TOKENS:
+            continue
+        signature = signatures[i] = minhash(words)
+        candidates = set()
+        for band in range(BANDS):
+            key = (band, signature[band * ROWS:(band + 1) * ROWS])
+            candidates.update(buckets.setdefault(key, []))
+            buckets[key].append(i)
+        # Join the earliest cluster whose first item is similar enough; comparing
+        # with the first item rather than any member stops chains of
+        # slightly-similar stories from merging into one cluster
+        for root in sorted({find(j) for j in candidates}):
+            if similarity(signature, signatures[root]) >= threshold:
+                parent[i] = root
+                break
+
+    groups = {}
+    for i in range(len(items)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+
+def collapse(articles, threshold=SIMILARITY_THRESHOLD):
+    """One article per near-duplicate cluster, the first of each in input order.
+
+    The others are listed under its 'duplicates' key.
+    """
+    collapsed = []
+    for group in cluster(articles, threshold=threshold):
+        first = dict(articles[group[0]])
+        if len(group) > 1:
+            first['duplicates'] = [
+                {key: articles[i][key] for key in ('link', 'source', 'category') if key in articles[i]}
+                for i in group[1:]
+            ]
+        collapsed.append(first)
+    return collapsed
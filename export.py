@@ -0,0 +1,227 @@
+"""Batch export of stored articles to NDJSON, gzipped CSV and Parquet.
+
+Crawls the requested categories (unless --no-crawl or they were crawled
+recently), then streams the stored articles in the date range into files
+partitioned by source and published date:
+
+    <out>/<format>/source=<id>/date=<YYYY-MM-DD>/part-0.<ext>
+
+    python app.py export --category "all sources" --start 2025-01-01 --end 2025-03-31 \\
+        --format ndjson --format csv --out exports
+
+Parquet output needs pyarrow (pip install pyarrow).
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+import logs
+from article_store import get_store
+from sources import get_registry
+
+FIELDS = ["source_id", "source", "published_date", "headline", "summary", "link", "categories", "fetched_at"]
+
+
+class NdjsonWriter:
+    extension = "ndjson"
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    extension = "csv.gz"
+
+    def __init__(self, path):
+        self.file = gzip.open(path, "wt", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(dict(row, categories=";".join(row["categories"])))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    extension = "parquet"
+    # Rows buffered per row group; the only rows an export holds in memory
+    ROW_GROUP_SIZE = 10000
+
+    def __init__(self, path):
+        if not HAVE_PYARROW:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.schema = pyarrow.schema([
+            ("source_id", pyarrow.string()),
+            ("source", pyarrow.string()),
+            ("published_date", pyarrow.string()),
+            ("headline", pyarrow.string()),
+            ("summary", pyarrow.string()),
+            ("link", pyarrow.string()),
+            ("categories", pyarrow.list_(pyarrow.string())),
+            ("fetched_at", pyarrow.float64()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.ROW_GROUP_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.writer.write_table(pyarrow.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+WRITERS = {"ndjson": NdjsonWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+class PartitionedExport:
+    """Writes rows to one file per format for each (source, date) partition.
+
+    Rows must arrive grouped by partition, as ArticleStore.iter_export
+    yields them, so only the current partition's files are ever open.
+    Files are written under a temporary name and renamed when complete.
+    """
+
+    def __init__(self, out_dir, formats):
+        self.out_dir = out_dir
+        self.formats = formats
+        self.partition = None
+        self.writers = []
+        self.rows = 0
+        self.partitions = 0
+        self.files = 0
+
+    def write(self, row):
+        partition = (row["source_id"], row["published_date"])
+        if partition != self.partition:
+            self.close()
+            self.open(partition)
+        for _, writer in self.writers:
+            writer.write(row)
+        self.rows += 1
+
+    def open(self, partition):
+        source_id, published = partition
+        for name in self.formats:
+            writer_class = WRITERS[name]
+            directory = os.path.join(self.out_dir, name, f"source={source_id}", f"date={published}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-0.{writer_class.extension}")
+            self.writers.append((path, writer_class(path + ".tmp")))
+        self.partition = partition
+        self.partitions += 1
+
+    def close(self):
+        for path, writer in self.writers:
+            writer.close()
+            os.replace(path + ".tmp", path)
+            self.files += 1
+        self.writers = []
+        self.partition = None
+
+
+def source_ids():
+    ids = {source.name: source_id for source_id, source in get_registry().sources.items()}
+    return lambda name: ids.get(name) or re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def export_articles(category_names, start_date, end_date, formats, out_dir):
+    source_id = source_ids()
+    export = PartitionedExport(out_dir, formats)
+    try:
+        for article in get_store().iter_export(category_names, start_date, end_date):
+            export.write(dict(article, source_id=source_id(article["source"])))
+    finally:
+        export.close()
+    return export
+
+
+def parse_day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def main(argv, expand_categories, crawl_category):
+    """Entry point; app.py passes in its category expansion and crawl functions."""
+    parser = argparse.ArgumentParser(prog="app.py export", description=__doc__.splitlines()[0])
+    parser.add_argument("--category", action="append", required=True,
+                        help="category or group such as 'all sources' (repeatable)")
+    parser.add_argument("--start", type=parse_day, help="first published date, YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_day, help="last published date, YYYY-MM-DD")
+    parser.add_argument("--format", action="append", choices=sorted(WRITERS),
+                        help="output format (repeatable, default ndjson)")
+    parser.add_argument("--out", default="exports", help="output directory (default: exports)")
+    parser.add_argument("--no-crawl", action="store_true", help="export what is stored without crawling first")
+    parser.add_argument("--max-articles", type=int, default=None, help="articles to crawl per category")
+    args = parser.parse_args(argv)
+
+    formats = args.format or ["ndjson"]
+    if "parquet" in formats and not HAVE_PYARROW:
+        parser.error("parquet needs pyarrow (pip install pyarrow)")
+    try:
+        category_names = expand_categories(args.category)
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    if not args.no_crawl:
+        store = get_store()
+        stale = [name for name in category_names if not store.is_fresh(name)]
+        kwargs = {"start_date": args.start, "end_date": args.end}
+        if args.max_articles:
+            kwargs["max_articles"] = args.max_articles
+
+        def crawl(name):
+            # A failed crawl is logged; what is stored for it is still exported
+            try:
+                crawl_category(name, **kwargs)
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(stale)))) as pool:
+            list(pool.map(crawl, stale))
+
+    export = export_articles(category_names, args.start, args.end, formats, args.out)
+    summary = {
+        "rows": export.rows,
+        "partitions": export.partitions,
+        "files": export.files,
+        "out": os.path.abspath(args.out),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logs.info("export_finished", **summary)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    import sys
+
+    import app
+    main(sys.argv[1:], app.expand_categories, app.crawl_category)
@@ -0,0 +1,232 @@
+import re
+from datetime import datetime
+
+import logs
+from dates import date_hint, extract_published_date, prefix_published_date
+from dedup import canonical_url
+
+
+# Closing tags a page prefix can be cut after without leaving the headline,
+# date or a JSON-LD block half-read
+PREFIX_CUT_RE = re.compile(rb"</(?:head|h1|h2|time|p|div|header|section|script)\s*>", re.I)
+
+
+def discover_links(source, category_name, soup):
+    """Article URLs on a listing page, in page order, with their date hints.
+
+    Link rules (all optional except "selector"):
+      containers      CSS selector of story cards; the first link in each is
+                      taken, and "selector" is only used if none are found
+      selector        CSS selector of candidate links
+      include         keep only hrefs containing one of these substrings
+      exclude         drop hrefs containing any of these substrings
+      min_segments    drop hrefs with fewer '/'-separated parts
+      same_site_only  drop absolute links to other hosts
+      keep_query      keep query strings, which are otherwise dropped along
+                      with fragments and AMP variants (see canonical_url)
+    """
+    rules = source.link_rules(category_name)
+    tags = []
+    if rules.get("containers"):
+        for container in soup.select(rules["containers"]):
+            tag = container.find('a')
+            if tag and tag.has_attr('href'):
+                tags.append(tag)
+    if not tags:
+        tags = soup.select(rules["selector"])
+
+    include = rules.get("include")
+    exclude = rules.get("exclude", ())
+    min_segments = rules.get("min_segments", 0)
+    same_site_only = rules.get("same_site_only", False)
+    keep_query = rules.get("keep_query", False)
+
+    links = []
+    hints = {}
+    for tag in tags:
+        href = tag.get('href')
+        if not href:
+            continue
+        if any(skip in href for skip in exclude):
+            continue
+        if include and not any(pattern in href for pattern in include):
+            continue
+        if len(href.split('/')) < min_segments:
+            continue
+
+        if href.startswith('/'):
+            href = source.base_url + href
+        elif same_site_only and not href.startswith(source.base_url + '/'):
+            continue
+        elif not href.startswith('http'):
+            continue
+
+        href = canonical_url(href, keep_query)
+        if href in hints:
+            continue
+        links.append(href)
+        hints[href] = date_hint(href, tag)
+    return links, hints
+
+
+def feed_entries(source, category_name, entries):
+    """Feed entries that belong to category, keyed by article URL in feed order.
+
+    The category's feed "include" substrings and the source's link
+    "exclude" substrings apply as on a listing page.
+    """
+    include = source.feed_for(category_name).get("include")
+    rules = source.link_rules(category_name)
+    exclude = rules.get("exclude", ())
+
+    found = {}
+    for entry in entries:
+        # Feeds often tag links with tracking parameters the listings don't use
+        link = canonical_url(entry['link'], rules.get("keep_query", False))
+        if any(skip in link for skip in exclude):
+            continue
+        if include and not any(pattern in link for pattern in include):
+            continue
+        if not link.startswith('http') or link in found:
+            continue
+        found[link] = dict(entry, link=link)
+    return found
+
+
+def first_text(soup, selectors, min_length=0):
+    for selector in selectors:
+        for element in soup.select(selector):
+            text = element.get_text(strip=True)
+            if len(text) > min_length:
+                return text
+    return None
+
+
+def extract_headline(source, soup, use_title=True):
+    rules = source.headline
+    headline = None
+    for selector in rules["selectors"]:
+        element = soup.select_one(selector)
+        if element:
+            headline = element.get_text(strip=True)
+            if headline:
+                break
+
+    # Fall back to the <title>, minus the publisher's suffix
+    suffix = rules.get("title_suffix")
+    if not headline and suffix and use_title:
+        title_tag = soup.find('title')
+        if title_tag:
+            title_text = title_tag.get_text(strip=True)
+            if suffix in title_text:
+                headline = title_text.split(suffix)[0].strip()
+    return headline or None
+
+
+def extract_summary(source, soup):
+    rules = source.summary
+    min_length = rules.get("min_length", 0)
+    summary = None
+
+    if rules.get("meta_description"):
+        summary = meta_description(soup)
+
+    if not summary:
+        summary = first_text(soup, rules.get("selectors", ()), min_length)
+
+    # Last resort: any paragraph not inside page furniture
+    if not summary and rules.get("any_paragraph"):
+        excluded = rules.get("exclude_parent_classes", ())
+        for p in soup.find_all('p'):
+            if p.parent and not any(cls in str(p.parent.get('class', '')) for cls in excluded):
+                text = p.get_text(strip=True)
+                if len(text) > min_length:
+                    summary = text
+                    break
+
+    return truncate_summary(source, summary)
+
+
+def meta_description(soup):
+    meta = soup.find('meta', attrs={'name': 'description'})
+    if meta and meta.get('content'):
+        return meta['content']
+    return None
+
+
+def truncate_summary(source, summary):
+    max_length = source.summary.get("max_length")
+    if summary and max_length and len(summary) > max_length:
+        summary = summary[:max_length] + '...'
+    return summary
+
+
+def make_article(source, link, headline, summary, published_date):
+    return {
+        'headline': headline,
+        'summary': summary,
+        'link': link,
+        'published_date': published_date.strftime("%Y-%m-%d"),
+        'formatted_date': published_date.strftime("%B %d, %Y"),
+        'source': source.name
+    }
+
+
+def article_from_fields(source, link, fields):
+    """Article dict from feed fields alone, or None if any field is missing."""
+    if fields.get('headline') and fields.get('summary') and fields.get('published_date'):
+        return make_article(source, link, fields['headline'], truncate_summary(source, fields['summary']),
+                            fields['published_date'])
+    return None
+
+
+def extract_article(source, article_soup, link, known=None):
+    """Article dict for a parsed article page, or None if it's incomplete.
+
+    Fields already in known (e.g. from a feed entry) are used as they are
+    and not looked for on the page.
+    """
+    known = known or {}
+    published_date = known.get('published_date') or extract_published_date(article_soup, link, source.date_rules)
+    if not published_date:
+        if source.date.get("missing", "today") == "skip":
+            return None
+        # Use today's date as a last resort
+        published_date = datetime.today().date()
+        logs.info("date_fallback_today", source=source.id, url=link)
+
+    headline = known.get('headline') or extract_headline(source, article_soup)
+    summary = truncate_summary(source, known.get('summary')) or extract_summary(source, article_soup)
+    if headline and summary:
+        return make_article(source, link, headline, summary, published_date)
+    return None
+
+
+def page_prefix(data):
+    """The start of a partly read page up to its last cleanly closed block, or b''."""
+    end = 0
+    for match in PREFIX_CUT_RE.finditer(data):
+        end = match.end()
+    return data[:end]
+
+
+def extract_article_head(source, article_soup, link, known=None, head_soup=None):
+    """Article dict from the start of a page, or None if a field isn't there yet.
+
+    Stricter than extract_article: the summary must be the meta description,
+    since paragraphs may be cut off, the date must come from JSON-LD, <head>
+    or, for sources without JSON-LD, the top-priority selector (see
+    prefix_published_date; head_soup is the parsed <head>), and the
+    fallbacks that only apply when the page has no headline or date element
+    (the <title>, the URL's date, today) aren't used.
+    """
+    known = known or {}
+    published_date = known.get('published_date') or prefix_published_date(
+        article_soup, head_soup, source.date_rules)
+    headline = known.get('headline') or extract_headline(source, article_soup, use_title=False)
+    summary = known.get('summary')
+    if not summary and source.summary.get("meta_description"):
+        summary = meta_description(article_soup)
+    if published_date and headline and summary:
+        return make_article(source, link, headline, truncate_summary(source, summary), published_date)
+    return None
@@ -0,0 +1,100 @@
+import io
+import re
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+
+from bs4 import BeautifulSoup
+
+from dates import parse_iso_date
+
+# Elements holding one story in RSS 2.0, Atom and (news) sitemaps
+ENTRY_TAGS = {"item", "entry", "url"}
+TITLE_TAGS = ("title",)
+SUMMARY_TAGS = ("description", "summary", "content")
+DATE_TAGS = ("pubDate", "published", "publication_date", "updated", "date", "lastmod")
+
+TAG_RE = re.compile(r'<[a-zA-Z/!]')
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ""
+
+
+def parse_feed_date(value):
+    value = value.strip()
+    if not value:
+        return None
+    found = parse_iso_date(value)
+    if found:
+        return found
+    try:
+        return parsedate_to_datetime(value).date()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def plain_text(value):
+    value = value.strip()
+    if TAG_RE.search(value):
+        value = BeautifulSoup(value, 'html.parser').get_text(" ", strip=True)
+    return value
+
+
+def entry_fields(element):
+    children = {}
+    link = None
+    for child in element.iter():
+        if child is element:
+            continue
+        name = local_name(child.tag)
+        if name == "link":
+            # Atom puts the URL in href; prefer rel="alternate" (the default)
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate" and link is None:
+                link = href
+            elif child.text and child.text.strip() and link is None:
+                link = child.text.strip()
+        elif name == "loc" and link is None and child.text:
+            link = child.text.strip()
+        elif name not in children and child.text and child.text.strip():
+            children[name] = child.text
+
+    fields = {'link': link}
+    for key, names in (('headline', TITLE_TAGS), ('summary', SUMMARY_TAGS)):
+        for name in names:
+            if name in children:
+                text = plain_text(children[name])
+                if text:
+                    fields[key] = text
+                    break
+    for name in DATE_TAGS:
+        if name in children:
+            published = parse_feed_date(children[name])
+            if published:
+                fields['published_date'] = published
+                break
+    return fields
+
+
+def parse_feed(data):
+    """Yield a dict per story in an RSS, Atom or sitemap document.
+
+    Each has 'link' and whichever of 'headline', 'summary' and
+    'published_date' (a date) the feed carries. The document is parsed
+    incrementally and every story element is dropped once read, so memory
+    stays flat however long the feed is.
+    """
+    stack = []
+    for event, element in ET.iterparse(io.BytesIO(data), events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            continue
+        stack.pop()
+        # Elements nested inside a story are never stories themselves
+        if local_name(element.tag) in ENTRY_TAGS and not any(local_name(e.tag) in ENTRY_TAGS for e in stack):
+            fields = entry_fields(element)
+            if fields['link']:
+                yield fields
+            element.clear()
+            if stack:
+                stack[-1].remove(element)
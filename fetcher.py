@@ -0,0 +1,509 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import settings
+from http_cache import ResponseCache
+from metrics import (circuit_events_total, host_concurrency, partial_fetch_bytes_total, partial_fetches_total,
+                     throttle_seconds)
+from replay import Archive, rewrite_to
+from throttle import POLL_SECONDS, AdaptiveLimit, CircuitBreaker, retry_after_seconds
+
+# Per-source politeness settings, filled in from sources.json by
+# sources.SourceRegistry.install(). `concurrency` is how many requests to
+# the source's host start out in flight at once, `requests_per_second` and
+# `burst` size the token bucket shared by every request to that host. Both
+# adapt to how the host responds (see throttle.AdaptiveLimit): concurrency
+# grows up to `max_concurrency` (default twice `concurrency`) while replies
+# come back within `latency_target` seconds. The rate drops with the window
+# when it shrinks but never rises above `requests_per_second`.
+SOURCE_LIMITS = {}
+DEFAULT_LIMITS = {"concurrency": 2, "requests_per_second": 1.0, "burst": 1, "max_concurrency": None,
+                  "latency_target": 2.0}
+
+# Shared connection pool settings. `pool_connections` is the number of hosts
+# kept in the pool manager, `pool_maxsize` the keep-alive connections per host.
+POOL_SETTINGS = {
+    "pool_connections": 10,
+    "pool_maxsize": 8,
+    "retries": 3,
+    "backoff_factor": 0.5,
+}
+# Retried by the connection pool. Overload statuses are retried by fetch()
+# instead so the host's throttle sees them and honours Retry-After.
+RETRY_STATUSES = (500, 502, 504)
+OVERLOAD_STATUSES = (429, 503)
+OVERLOAD_RETRIES = 2
+# (connect, read) timeout applied to every request that doesn't set its own
+DEFAULT_TIMEOUT = (5, 15)
+# Bytes read at a time by fetch_partial()
+PARTIAL_CHUNK_SIZE = 8192
+# What a fetch_partial() enough() returns to have the rest of the body read
+READ_REST = "rest"
+# fetch_partial() still reads a body to the end once enough() is satisfied
+# if at most this many bytes are left, so the connection goes back to the
+# pool; dropping it costs the next request to the host a new TCP+TLS handshake
+DRAIN_MAX_BYTES = 16 * 1024
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = float(rate)
+
+    def acquire(self, cancelled=None):
+        """Take a token, waiting as needed; returns False early if cancelled() becomes true."""
+        while True:
+            if cancelled and cancelled():
+                return False
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(min(wait_for, POLL_SECONDS) if cancelled else wait_for)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+_windows = {}
+_breakers = {}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of requesting a page from a source whose circuit is open."""
+
+
+def get_limits(source_type):
+    return SOURCE_LIMITS.get(source_type, DEFAULT_LIMITS)
+
+
+def max_concurrency(source_type):
+    limits = get_limits(source_type)
+    return max(1, limits["max_concurrency"] or 2 * limits["concurrency"])
+
+
+def configure_source(source_type, concurrency=None, requests_per_second=None, burst=None, max_concurrency=None,
+                     latency_target=None):
+    limits = dict(get_limits(source_type))
+    if concurrency is not None:
+        limits["concurrency"] = concurrency
+    if requests_per_second is not None:
+        limits["requests_per_second"] = requests_per_second
+    if burst is not None:
+        limits["burst"] = burst
+    if max_concurrency is not None:
+        limits["max_concurrency"] = max_concurrency
+    if latency_target is not None:
+        limits["latency_target"] = latency_target
+    SOURCE_LIMITS[source_type] = limits
+    # Drop existing buckets and windows so the new limits take effect on the next request
+    with _buckets_lock:
+        for key in [k for k in _buckets if k[0] == source_type]:
+            del _buckets[key]
+        for key in [k for k in _windows if k[0] == source_type]:
+            del _windows[key]
+
+
+def get_bucket(source_type, url):
+    key = (source_type, urlparse(url).netloc)
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            limits = get_limits(source_type)
+            bucket = TokenBucket(limits["requests_per_second"], limits["burst"])
+            _buckets[key] = bucket
+        return bucket
+
+
+def get_window(source_type, url):
+    key = (source_type, urlparse(url).netloc)
+    with _buckets_lock:
+        window = _windows.get(key)
+        if window is None:
+            limits = get_limits(source_type)
+            window = AdaptiveLimit(max(1, limits["concurrency"]), max_concurrency(source_type),
+                                   limits["latency_target"])
+            _windows[key] = window
+        return window
+
+
+def get_breaker(source_type):
+    with _buckets_lock:
+        breaker = _breakers.get(source_type)
+        if breaker is None:
+            breaker = _breakers[source_type] = CircuitBreaker(
+                source_type, settings.BREAKER_FAILURES, settings.BREAKER_COOLDOWN)
+        return breaker
+
+
+def source_available(source_type):
+    """False while the source's circuit is open and requests to it are refused."""
+    return get_breaker(source_type).available
+
+
+_session = None
+_session_lock = threading.Lock()
+
+# Sockets actually opened per "scheme://host"; the pools' own num_connections
+# misses the reconnects urllib3 makes when a pooled connection was dropped
+_opened = {}
+_opened_lock = threading.Lock()
+
+
+class CountingConnection:
+    scheme = "http"
+
+    def _new_conn(self):
+        sock = super()._new_conn()
+        key = f"{self.scheme}://{self.host}"
+        with _opened_lock:
+            _opened[key] = _opened.get(key, 0) + 1
+        return sock
+
+
+class CountingHTTPConnection(CountingConnection, HTTPConnection):
+    pass
+
+
+class CountingHTTPSConnection(CountingConnection, HTTPSConnection):
+    scheme = "https"
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CountingHTTPConnection
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CountingHTTPSConnection
+
+
+class CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": CountingHTTPConnectionPool,
+                                                   "https": CountingHTTPSConnectionPool}
+
+
+def build_session():
+    retry = Retry(
+        total=POOL_SETTINGS["retries"],
+        backoff_factor=POOL_SETTINGS["backoff_factor"],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = CountingAdapter(
+        pool_connections=POOL_SETTINGS["pool_connections"],
+        pool_maxsize=POOL_SETTINGS["pool_maxsize"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # requests already advertises gzip/deflate, and br when the brotli
+    # package is installed, and decodes the body transparently.
+    return session
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def connection_stats():
+    """Per-host counts of connections opened and reused by the shared session."""
+    stats = {}
+    with _session_lock:
+        session = _session
+    if session is None:
+        return stats
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}"
+            entry = stats.setdefault(host, {"requests": 0, "opened": 0, "reused": 0})
+            entry["requests"] += pool.num_requests
+    with _opened_lock:
+        for host, entry in stats.items():
+            entry["opened"] = _opened.get(host, 0)
+            entry["reused"] = max(0, entry["requests"] - entry["opened"])
+    return stats
+
+
+# Set to False to bypass the on-disk response cache entirely
+CACHE_ENABLED = True
+_cache = None
+
+# Record/replay hooks: RECORDER archives every 200 response, URL_REWRITE
+# maps a publisher URL to the address actually requested
+RECORDER = Archive(settings.RECORD_DIR) if settings.RECORD_DIR else None
+URL_REWRITE = rewrite_to(settings.REPLAY_URL) if settings.REPLAY_URL else None
+
+
+def get_cache():
+    global _cache
+    with _session_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def fetch(url, headers, source_type, timeout=None, revalidate=False, min_ttl=None):
+    """GET url through the rate limiter, shared session and response cache.
+
+    A fresh cached copy is returned without touching the network unless
+    revalidate is set; min_ttl (seconds) extends freshness for pages such as
+    articles that rarely change even when the server sends a short max-age.
+    Stale copies are revalidated with If-None-Match / If-Modified-Since.
+
+    While the source's circuit is open, or when the host still answers with
+    an overload or server error after the retries, the cached copy is
+    returned however old it is; without one CircuitOpenError is raised or
+    the error response returned.
+    """
+    cache = get_cache() if CACHE_ENABLED else None
+    entry = cache.get(url) if cache else None
+    if entry and not revalidate and entry.is_fresh(min_ttl):
+        cache.count("hits")
+        return entry.to_response()
+
+    request_headers = dict(headers)
+    if entry:
+        request_headers.update(entry.conditional_headers())
+
+    try:
+        response = guarded_get(url, request_headers, source_type, timeout)
+    except CircuitOpenError:
+        circuit_events_total.inc(source_type, "short_circuited")
+        if entry:
+            cache.count("stale")
+            return entry.to_response()
+        raise
+    if entry and (response.status_code >= 500 or response.status_code in OVERLOAD_STATUSES):
+        response.close()
+        cache.count("stale")
+        return entry.to_response()
+    if RECORDER and response.status_code == 200:
+        RECORDER.record(url, response)
+
+    if cache:
+        if entry and response.status_code == 304:
+            cache.count("revalidated")
+            cache.refresh(entry, response)
+            return entry.to_response()
+        cache.count("misses")
+        if response.status_code == 200:
+            cache.store(url, response)
+    return response
+
+
+def fetch_partial(url, headers, source_type, enough, max_bytes, timeout=None, min_ttl=None):
+    """GET only as much of url as it takes for enough(body_so_far) to be true.
+
+    The body is read in chunks and the connection dropped once enough()
+    returns true, unless no more than DRAIN_MAX_BYTES are left or RECORDER
+    needs the whole page, in which case the rest is read. If enough()
+    returns READ_REST instead, or max_bytes are read first, the rest of the
+    body is read without asking again, so a page that is needed whole
+    after all comes off the same connection. The response's `partial`
+    attribute says whether the body was cut short and `bytes_read` how much
+    of it came off the wire; only whole bodies are cached. Pages already in
+    the cache go through fetch() and are whole.
+    """
+    cache = get_cache() if CACHE_ENABLED else None
+    if cache and cache.get(url):
+        response = fetch(url, headers, source_type, timeout=timeout, min_ttl=min_ttl)
+        response.partial = False
+        response.bytes_read = 0
+        return response
+
+    response = guarded_get(url, headers, source_type, timeout, stream=True)
+    if response.status_code != 200:
+        response.close()
+        response.partial = False
+        response.bytes_read = 0
+        return response
+
+    chunks = []
+    read = 0
+    result = "whole"
+    try:
+        for chunk in response.iter_content(PARTIAL_CHUNK_SIZE):
+            chunks.append(chunk)
+            read += len(chunk)
+            if result != "whole":
+                continue
+            wanted = enough(b"".join(chunks))
+            if wanted == READ_REST:
+                result = "read_rest"
+            elif wanted:
+                if not RECORDER and not short_remainder(response):
+                    result = "stopped"
+                    break
+                result = "drained"
+            elif read >= max_bytes:
+                result = "capped"
+        # Bytes off the wire, which is what Content-Length counts too
+        wire = bytes_off_wire(response, read)
+    finally:
+        response.close()
+    response._content = b"".join(chunks)
+    response.partial = result == "stopped"
+    response.bytes_read = wire
+
+    partial_fetches_total.inc(source_type, result)
+    partial_fetch_bytes_total.inc(source_type, "read", amount=wire)
+    if not response.partial:
+        if RECORDER:
+            RECORDER.record(url, response)
+        if cache:
+            cache.count("misses")
+            cache.store(url, response)
+    return response
+
+
+def bytes_off_wire(response, read):
+    return response.raw.tell() if hasattr(response.raw, "tell") else read
+
+
+def short_remainder(response):
+    # Whether the unread rest of a body is known to be small enough to drain
+    length = response.headers.get("Content-Length", "")
+    if not length.isdigit() or not hasattr(response.raw, "tell"):
+        return False
+    return int(length) - response.raw.tell() <= DRAIN_MAX_BYTES
+
+
+def guarded_get(url, headers, source_type, timeout=None, stream=False):
+    """throttled_get() that keeps the source's circuit breaker informed."""
+    breaker = get_breaker(source_type)
+    try:
+        response = throttled_get(url, headers, source_type, timeout, stream)
+    except CircuitOpenError:
+        raise
+    except Exception:
+        breaker.failure()
+        raise
+    if response.status_code >= 500 or response.status_code in OVERLOAD_STATUSES:
+        breaker.failure()
+    else:
+        breaker.success()
+    return response
+
+
+def throttled_get(url, headers, source_type, timeout=None, stream=False):
+    """GET url within the host's adaptive window and rate, retrying overloads.
+
+    A 429/503 halves the window and pauses the host for its Retry-After,
+    after which the request is tried again; a Retry-After longer than
+    settings.MAX_RETRY_AFTER opens the source's circuit instead. Raises
+    CircuitOpenError if the circuit is open, or opens while the request
+    waits for its turn.
+    """
+    breaker = get_breaker(source_type)
+    circuit_open = lambda: not breaker.available
+    window = get_window(source_type, url)
+    bucket = get_bucket(source_type, url)
+    base_rate = get_limits(source_type)["requests_per_second"]
+    target = URL_REWRITE(url) if URL_REWRITE else url
+    for attempt in range(OVERLOAD_RETRIES + 1):
+        waited = time.perf_counter()
+        if not window.acquire(circuit_open):
+            raise CircuitOpenError(f"Circuit open for {source_type}: {url}")
+        if not bucket.acquire(circuit_open) or (attempt == 0 and not breaker.allow()):
+            window.cancel()
+            raise CircuitOpenError(f"Circuit open for {source_type}: {url}")
+        throttle_seconds.observe(time.perf_counter() - waited, source_type)
+        started = time.perf_counter()
+        try:
+            response = get_session().get(target, headers=headers, timeout=timeout or DEFAULT_TIMEOUT, stream=stream)
+        except Exception:
+            window.release()
+            adapted(source_type, url, window, bucket, base_rate)
+            raise
+        overloaded = response.status_code in OVERLOAD_STATUSES
+        retry_after = retry_after_seconds(response.headers.get("Retry-After")) if overloaded else None
+        if retry_after and retry_after > settings.MAX_RETRY_AFTER:
+            window.release(overloaded=True)
+            adapted(source_type, url, window, bucket, base_rate)
+            breaker.trip(retry_after)
+            break
+        window.release(time.perf_counter() - started, overloaded, retry_after)
+        adapted(source_type, url, window, bucket, base_rate)
+        if not overloaded or attempt == OVERLOAD_RETRIES:
+            break
+        response.close()
+    return response
+
+
+def adapted(source_type, url, window, bucket, base_rate):
+    # Follow a change in the host's window with its rate and gauge; a wider
+    # window only adds concurrency, the configured rate stays the ceiling
+    bucket.set_rate(base_rate * min(1.0, window.scale))
+    host_concurrency.set(source_type, urlparse(url).netloc, value=round(window.limit, 2))
+
+
+def iter_concurrently(items, worker, source_type, max_results):
+    """Run worker over items with a bounded number in flight.
+
+    Yields each non-None result as soon as it is ready and stops submitting
+    new work once max_results have been yielded.
+    """
+    # Enough threads for the host's window at its widest; fetch() keeps the
+    # number of requests actually in flight within the current window
+    concurrency = max_concurrency(source_type)
+    produced = 0
+    pending = set()
+    items = iter(items)
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while produced < max_results:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(worker, item))
+
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is not None and produced < max_results:
+                    produced += 1
+                    yield result
+
+        # Anything still in flight is left to finish; its results are dropped
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,187 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    encoding TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    no_cache INTEGER NOT NULL DEFAULT 0,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+# Hop-by-hop and encoding headers that no longer describe the stored body
+SKIP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+MAX_AGE_RE = re.compile(r"(?:^|,)\s*(?:s-maxage|max-age)\s*=\s*\"?(\d+)", re.I)
+
+
+def parse_cache_control(headers):
+    value = headers.get("Cache-Control", "")
+    directives = {part.strip().split("=")[0].lower() for part in value.split(",") if part.strip()}
+    match = MAX_AGE_RE.search(value)
+    max_age = int(match.group(1)) if match else None
+    return directives, max_age
+
+
+def freshness_lifetime(headers, now):
+    directives, max_age = parse_cache_control(headers)
+    if max_age is not None:
+        return max_age
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return max(0, parsedate_to_datetime(expires).timestamp() - now)
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+class CachedEntry:
+    def __init__(self, row):
+        (self.url, self.status, headers, self.encoding, body, self.size, self.etag,
+         self.last_modified, no_cache, self.stored_at, self.expires_at, _) = row
+        self.headers = json.loads(headers)
+        self.body = zlib.decompress(body)
+        self.no_cache = bool(no_cache)
+
+    def is_fresh(self, min_ttl=None, now=None):
+        if self.no_cache:
+            return False
+        now = now or time.time()
+        expires_at = self.expires_at
+        if min_ttl:
+            expires_at = max(expires_at, self.stored_at + min_ttl)
+        return now < expires_at
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self):
+        response = requests.Response()
+        response.status_code = self.status
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response._content = self.body
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    """URL-keyed HTTP response cache stored in SQLite with LRU eviction."""
+
+    def __init__(self, path=settings.HTTP_CACHE_PATH, max_bytes=settings.HTTP_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0, "stale": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def count(self, key):
+        with self.write_lock:
+            self.stats[key] += 1
+
+    def get(self, url):
+        row = self.connection().execute("SELECT * FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        with self.write_lock:
+            conn = self.connection()
+            conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+        return CachedEntry(row)
+
+    def store(self, url, response):
+        directives, _ = parse_cache_control(response.headers)
+        if "no-store" in directives:
+            return
+        now = time.time()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in SKIP_HEADERS}
+        body = zlib.compress(response.content)
+        with self.write_lock:
+            conn = self.connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, json.dumps(headers), response.encoding, body, len(body),
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 int("no-cache" in directives), now, now + freshness_lifetime(response.headers, now), now)
+            )
+            conn.commit()
+            self.stats["stored"] += 1
+            self.evict(conn)
+
+    def refresh(self, entry, not_modified):
+        """Merge headers from a 304 into the stored entry and restart its freshness clock."""
+        now = time.time()
+        headers = dict(entry.headers)
+        headers.update({k: v for k, v in not_modified.headers.items() if k.lower() not in SKIP_HEADERS})
+        directives, _ = parse_cache_control(headers)
+        entry.headers = headers
+        entry.stored_at = now
+        entry.expires_at = now + freshness_lifetime(headers, now)
+        entry.no_cache = "no-cache" in directives
+        entry.etag = headers.get("ETag", entry.etag)
+        entry.last_modified = headers.get("Last-Modified", entry.last_modified)
+        with self.write_lock:
+            conn = self.connection()
+            conn.execute(
+                "UPDATE responses SET headers = ?, etag = ?, last_modified = ?, no_cache = ?, "
+                "stored_at = ?, expires_at = ?, last_access = ? WHERE url = ?",
+                (json.dumps(headers), entry.etag, entry.last_modified, int(entry.no_cache),
+                 now, entry.expires_at, now, entry.url)
+            )
+            conn.commit()
+
+    def evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall()
+        victims = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((url,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+        conn.commit()
+        self.stats["evicted"] += len(victims)
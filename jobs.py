@@ -0,0 +1,127 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import logs
+from metrics import jobs_total
+
+
+class Job:
+    """One background search whose results accumulate as they are produced."""
+
+    def __init__(self, key, params):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.params = params
+        self.status = "queued"
+        self.results = []
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.condition = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def add(self, item):
+        with self.condition:
+            self.results.append(item)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.status = "failed" if error else "done"
+            self.error = error
+            self.finished = time.time()
+            self.condition.notify_all()
+
+    def wait(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: self.done, timeout)
+
+    def follow(self, offset=0, idle_timeout=None):
+        """Yield results from offset on as they arrive, until the job ends."""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.done or len(self.results) > offset, idle_timeout)
+                items = self.results[offset:]
+                done = self.done
+            yield from items
+            offset += len(items)
+            if done or not items:
+                return
+
+    def to_dict(self, offset=0):
+        with self.condition:
+            items = self.results[offset:]
+            return dict(
+                self.params,
+                job_id=self.id,
+                status=self.status,
+                error=self.error,
+                articles=items,
+                count=len(items),
+                next_offset=offset + len(items),
+                created=self.created,
+                finished=self.finished,
+            )
+
+
+class JobManager:
+    """Runs jobs on a bounded pool and coalesces identical submissions.
+
+    While a job for a key is queued or running, submitting the same key
+    returns that job instead of starting another, so simultaneous users
+    asking for the same thing share one run. Finished jobs stay readable
+    for keep_seconds.
+    """
+
+    def __init__(self, max_workers, keep_seconds):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.keep_seconds = keep_seconds
+        self.jobs = {}
+        self.active = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, params, run, *args):
+        """Return (job, coalesced) for key, starting run(*args) if no job is active."""
+        with self.lock:
+            self.purge()
+            job = self.active.get(key)
+            if job is not None:
+                jobs_total.inc("coalesced")
+                return job, True
+            job = Job(key, params)
+            self.active[key] = job
+            self.jobs[job.id] = job
+        jobs_total.inc("started")
+        self.executor.submit(self.run, job, run, args)
+        return job, False
+
+    def run(self, job, run, args):
+        job.status = "running"
+        error = None
+        try:
+            for item in run(*args):
+                job.add(item)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logs.error("job_failed", job=job.id, error=error, **job.params)
+        finally:
+            # Leave active first so a submission arriving after the results
+            # are complete starts afresh rather than joining a finished job
+            with self.lock:
+                if self.active.get(job.key) is job:
+                    del self.active[job.key]
+            job.finish(error)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def purge(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [i for i, job in self.jobs.items() if job.done and job.finished < cutoff]:
+            del self.jobs[job_id]
@@ -0,0 +1,48 @@
+import json
+import logging
+import sys
+import time
+
+logger = logging.getLogger("news")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, event and any fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure(level=logging.INFO, stream=None):
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def log_event(level, event, **fields):
+    logger.log(level, event, extra={"fields": fields})
+
+
+def info(event, **fields):
+    log_event(logging.INFO, event, **fields)
+
+
+def warning(event, **fields):
+    log_event(logging.WARNING, event, **fields)
+
+
+def error(event, **fields):
+    log_event(logging.ERROR, event, **fields)
+
+
+configure()
@@ -0,0 +1,183 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *label_values, value):
+        with self.lock:
+            self.values[label_values] = value
+
+    def expose(self):
+        lines = super().expose()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    labels = format_labels(self.labels + ("le",), label_values + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.labels + ("le",), label_values + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                labels = format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "news_stage_duration_seconds",
+    "Time spent per scraping stage (fetch, parse, extract, filter).",
+    ("stage", "source", "category"),
+)
+articles_total = Counter(
+    "news_articles_total",
+    "Article candidates by outcome (kept, known, hint_skipped, incomplete, out_of_range, failed); "
+    "known covers stored articles and links already found not to be articles.",
+    ("source", "category", "outcome"),
+)
+throttle_seconds = Histogram(
+    "news_throttle_wait_seconds",
+    "Time requests spent waiting on the per-host rate limiter and concurrency window.",
+    ("source",),
+)
+crawls_total = Counter(
+    "news_crawls_total",
+    "Listing crawls by result.",
+    ("source", "category", "result"),
+)
+feed_entries_total = Counter(
+    "news_feed_entries_total",
+    "Feed entries by completeness (complete needs no page fetch, partial does) and failed feed reads.",
+    ("source", "category", "kind"),
+)
+partial_fetches_total = Counter(
+    "news_partial_fetches_total",
+    "Article pages read with a partial fetch, by result: stopped (the fields were found and the connection dropped, "
+    "so the next request to the host opens a new one), drained (the fields were found and the short rest read to "
+    "keep the connection, or to record the page), read_rest (the head has no summary, so the rest was read), capped "
+    "(the byte limit was reached, so the rest was read) or whole (the page ended first).",
+    ("source", "result"),
+)
+partial_fetch_bytes_total = Counter(
+    "news_partial_fetch_bytes_total",
+    "Bytes read by partial article fetches, and bytes left unread by those that found every field, where the page "
+    "size was known.",
+    ("source", "kind"),
+)
+circuit_events_total = Counter(
+    "news_circuit_events_total",
+    "Per-source circuit breaker events: opened, closed, and requests short-circuited while open.",
+    ("source", "event"),
+)
+host_concurrency = Gauge(
+    "news_host_concurrency",
+    "Current adaptive concurrency window per host.",
+    ("source", "host"),
+)
+circuit_open = Gauge(
+    "news_circuit_open",
+    "1 while a source's circuit breaker is open or half-open.",
+    ("source",),
+)
+jobs_total = Counter(
+    "news_jobs_total",
+    "Search job submissions: started a new job or joined (coalesced into) a running one.",
+    ("result",),
+)
+
+# Callables returning extra exposition lines, e.g. for stats kept elsewhere
+_collectors = []
+
+
+def sample_lines(name, metric_type, help_text, samples):
+    """Exposition lines for (labels dict, value) samples gathered on demand."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{format_labels(tuple(labels), tuple(labels.values()))} {value}")
+    return lines
+
+
+def register_collector(collect):
+    _collectors.append(collect)
+    return collect
+
+
+@contextmanager
+def timed(stage, source_type, category):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - started, stage, source_type, category)
+
+
+def expose():
+    lines = []
+    for metric in (stage_seconds, throttle_seconds, articles_total, crawls_total, feed_entries_total,
+                   partial_fetches_total, partial_fetch_bytes_total, host_concurrency, circuit_events_total,
+                   circuit_open, jobs_total):
+        lines.extend(metric.expose())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
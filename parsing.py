@@ -0,0 +1,67 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+# Parser backend per source and whether article pages are parsed in targeted
+# mode (only the elements the extractor looks at are built into the tree).
+# "lxml" silently falls back to "html.parser" when lxml isn't installed.
+# Both tables are filled in from sources.json by sources.SourceRegistry.install().
+SOURCE_PARSERS = {}
+DEFAULT_PARSER = {"backend": "html.parser", "targeted": False}
+
+# Elements each article extractor reads, as {"tags", "classes",
+# "class_substrings", "attrs"}. Tags are kept by name, everything else by
+# class, part of a class (for rules such as exclude_parent_classes that
+# match class substrings) or attribute value; a kept element keeps its whole
+# subtree so descendant selectors such as '.article-text p' still match and
+# paragraphs keep their parents.
+ARTICLE_ELEMENTS = {}
+
+
+def parser_settings(source_type):
+    return SOURCE_PARSERS.get(source_type, DEFAULT_PARSER)
+
+
+def backend_for(source_type):
+    backend = parser_settings(source_type)["backend"]
+    if backend == "lxml" and not HAVE_LXML:
+        return "html.parser"
+    return backend
+
+
+def article_strainer(source_type):
+    rules = ARTICLE_ELEMENTS.get(source_type)
+    if rules is None:
+        return None
+
+    def wanted(name, attrs=None):
+        attrs = attrs or {}
+        if name == "script":
+            return "script" in rules["tags"] and attrs.get("type") == "application/ld+json"
+        if name in rules["tags"]:
+            return True
+        classes = attrs.get("class") or ""
+        if isinstance(classes, str):
+            classes = classes.split()
+        if rules["classes"].intersection(classes):
+            return True
+        if any(part in cls for cls in classes for part in rules["class_substrings"]):
+            return True
+        return any(attrs.get(attr) in values for attr, values in rules["attrs"].items())
+
+    return SoupStrainer(wanted)
+
+
+def parse_html(markup, source_type=None):
+    return BeautifulSoup(markup, backend_for(source_type))
+
+
+def parse_article(markup, source_type, targeted=None):
+    if targeted is None:
+        targeted = parser_settings(source_type)["targeted"]
+    strainer = article_strainer(source_type) if targeted else None
+    return BeautifulSoup(markup, backend_for(source_type), parse_only=strainer)
@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Response headers worth keeping; encoding and length describe the wire
+# format, not the stored (decoded) body
+KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Expires")
+
+
+class Archive:
+    """Recorded responses on disk: an index.json plus one gzip file per URL."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.index_path = os.path.join(path, "index.json")
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def save(self, url, status, headers, body):
+        name = self.key(url) + ".gz"
+        with gzip.open(os.path.join(self.path, name), "wb") as f:
+            f.write(body)
+        entry = {
+            "file": name,
+            "status": status,
+            "headers": {k: headers[k] for k in KEEP_HEADERS if k in headers},
+            "recorded_at": time.time(),
+        }
+        with self.lock:
+            self.index[url] = entry
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+    def record(self, url, response):
+        self.save(url, response.status_code, response.headers, response.content)
+
+    def load(self, url):
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        with gzip.open(os.path.join(self.path, entry["file"]), "rb") as f:
+            body = f.read()
+        return entry["status"], entry["headers"], body
+
+    def urls(self):
+        return list(self.index)
+
+
+def rewrite_to(base_url):
+    """Map https://host/path?q to base_url/host/path?q for the replay server."""
+    base_url = base_url.rstrip("/")
+
+    def rewrite(url):
+        parts = urlsplit(url)
+        target = f"{base_url}/{parts.netloc}{parts.path or '/'}"
+        if parts.query:
+            target += "?" + parts.query
+        return target
+
+    return rewrite
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Partial fetches hang up mid-response on purpose
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class ReplayServer:
+    """Serves an Archive over local HTTP with configurable latency and errors.
+
+    Each response waits `latency` seconds plus up to `jitter` more, and a
+    fraction `error_rate` of requests fail with 503 instead.
+    """
+
+    def __init__(self, archive, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = {"served": 0, "missing": 0, "errors": 0}
+        self.server = QuietHTTPServer((host, port), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def make_handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                host, _, path = self.path.lstrip("/").partition("/")
+                url = f"https://{host}/{path}"
+                with replay.random_lock:
+                    delay = replay.latency + replay.random.uniform(0, replay.jitter)
+                    fail = replay.random.random() < replay.error_rate
+                time.sleep(delay)
+
+                if fail:
+                    replay.count("errors")
+                    self.reply(503, {"Content-Type": "text/plain"}, b"Service Unavailable")
+                    return
+                found = replay.archive.load(url)
+                if found is None:
+                    replay.count("missing")
+                    self.reply(404, {"Content-Type": "text/plain"}, b"Not recorded")
+                    return
+                status, headers, body = found
+                replay.count("served")
+                self.reply(status, headers, body)
+
+            def reply(self, status, headers, body):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def count(self, key):
+        with self.random_lock:
+            self.stats[key] += 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="replay-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
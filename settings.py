@@ -0,0 +1,65 @@
+import os
+
+# Directory holding the on-disk caches and stores. Override with NEWS_DATA_DIR.
+DATA_DIR = os.environ.get(
+    "NEWS_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+
+HTTP_CACHE_PATH = os.path.join(DATA_DIR, "http_cache.sqlite3")
+HTTP_CACHE_MAX_BYTES = int(os.environ.get("NEWS_HTTP_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+# Declarative source definitions (see sources.py). Override with NEWS_SOURCES_FILE.
+SOURCES_PATH = os.environ.get(
+    "NEWS_SOURCES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources.json")
+)
+# Ingest categories that have an RSS/Atom/sitemap feed from the feed instead
+# of their listing page
+FEEDS_ENABLED = os.environ.get("NEWS_FEEDS", "1") == "1"
+
+# Read article pages of sources with "head_fetch" in sources.json only up to
+# their headline, meta description and date, looked for in the first
+# HEAD_FETCH_MAX_BYTES unless the source sets its own cap; pages missing a
+# field are read to the end
+HEAD_FETCH_ENABLED = os.environ.get("NEWS_HEAD_FETCH", "1") == "1"
+HEAD_FETCH_MAX_BYTES = int(os.environ.get("NEWS_HEAD_FETCH_MAX_BYTES", 64 * 1024))
+
+ARTICLE_STORE_PATH = os.path.join(DATA_DIR, "articles.sqlite3")
+# A category whose listing was crawled within this many seconds is answered
+# straight from the article store without touching the network.
+LISTING_FRESH_SECONDS = int(os.environ.get("NEWS_LISTING_FRESH_SECONDS", 30 * 60))
+# Links that gave no article (not an article page, 404) are skipped on later
+# crawls for this long. Listing entries not seen again for FRONTIER_TTL are
+# forgotten.
+SEEN_URL_TTL = int(os.environ.get("NEWS_SEEN_URL_TTL", 7 * 24 * 60 * 60))
+FRONTIER_TTL = int(os.environ.get("NEWS_FRONTIER_TTL", 30 * 24 * 60 * 60))
+
+# Background crawler. Each source sets its crawl interval (seconds between
+# listing crawls) and concurrency (listing crawls at once) in sources.json;
+# these apply when it doesn't. Each run is shifted by up to CRAWL_JITTER of
+# its interval.
+BACKGROUND_CRAWL = os.environ.get("NEWS_BACKGROUND_CRAWL", "1") == "1"
+CRAWL_INTERVAL = 15 * 60
+CRAWL_CONCURRENCY = 1
+CRAWL_JITTER = 0.1
+CRAWL_MAX_ARTICLES = 20
+
+# Per-source circuit breaker: after BREAKER_FAILURES consecutive failed
+# requests a source is left alone for BREAKER_COOLDOWN seconds and answered
+# from the caches. Overloaded hosts (429/503) are retried after their
+# Retry-After when it is at most MAX_RETRY_AFTER seconds; a longer one opens
+# the circuit for that long instead.
+BREAKER_FAILURES = int(os.environ.get("NEWS_BREAKER_FAILURES", 5))
+BREAKER_COOLDOWN = int(os.environ.get("NEWS_BREAKER_COOLDOWN", 60))
+MAX_RETRY_AFTER = int(os.environ.get("NEWS_MAX_RETRY_AFTER", 10))
+
+# Searches run as background jobs on this many threads; identical searches
+# in flight share one job. Finished jobs can be read back for JOB_KEEP_SECONDS.
+JOB_WORKERS = int(os.environ.get("NEWS_JOB_WORKERS", 8))
+JOB_KEEP_SECONDS = int(os.environ.get("NEWS_JOB_KEEP_SECONDS", 10 * 60))
+
+# Record every fetched page into this directory (see replay.Archive)
+RECORD_DIR = os.environ.get("NEWS_RECORD_DIR")
+# Send all fetches to a replay server at this base URL instead of the publishers
+REPLAY_URL = os.environ.get("NEWS_REPLAY_URL")
@@ -0,0 +1,136 @@
+import json
+import threading
+
+import fetcher
+import parsing
+import settings
+from dates import compile_date_rules
+
+REQUIRED_FIELDS = ("name", "base_url", "links", "headline", "summary", "categories")
+
+
+class Source:
+    """One publisher as described in sources.json.
+
+    Besides the listing (and optional feed) URL of each category it holds
+    the rules the shared engine in extraction.py follows: how to find
+    article links on a listing, where the headline, summary and date live on an article page,
+    and the rate limits, crawl schedule and parser to use for it.
+    """
+
+    def __init__(self, source_id, spec):
+        missing = [field for field in REQUIRED_FIELDS if field not in spec]
+        if missing:
+            raise ValueError(f"Source {source_id} is missing {', '.join(missing)}")
+        self.id = source_id
+        self.name = spec["name"]
+        self.group = spec.get("group", spec["name"])
+        self.base_url = spec["base_url"].rstrip("/")
+        self.headers = spec.get("headers", {})
+        self.limits = spec.get("limits", {})
+        self.crawl = spec.get("crawl", {})
+        self.parser = spec.get("parser")
+        self.parse_only = spec.get("parse_only")
+        self.fetch_timeout = spec.get("fetch_timeout")
+        # {"max_bytes": ...} to read article pages only until their fields are
+        # found, for sources whose summary is the page's meta description
+        self.head_fetch = spec.get("head_fetch")
+        self.links = spec["links"]
+        self.headline = spec["headline"]
+        self.summary = spec["summary"]
+        self.date = spec.get("date", {})
+        self.date_rules = compile_date_rules(self.date)
+
+        # A category is either its listing URL or {"url": ..., "links": {...},
+        # "feed": ...}. "links" overrides the source's link rules for that
+        # listing. "feed" is an RSS/Atom/sitemap URL, or {"url": ...,
+        # "include": [...]} for a feed shared by several categories.
+        self.categories = {}
+        self.link_overrides = {}
+        self.feeds = {}
+        for name, category in spec["categories"].items():
+            if isinstance(category, str):
+                self.categories[name] = category
+                continue
+            self.categories[name] = category["url"]
+            if "links" in category:
+                self.link_overrides[name] = dict(self.links, **category["links"])
+            if "feed" in category:
+                feed = category["feed"]
+                self.feeds[name] = {"url": feed} if isinstance(feed, str) else feed
+
+    def link_rules(self, category_name):
+        return self.link_overrides.get(category_name, self.links)
+
+    def feed_for(self, category_name):
+        if not settings.FEEDS_ENABLED:
+            return None
+        return self.feeds.get(category_name)
+
+    def head_fetch_bytes(self):
+        # Byte cap for partial article fetches, or None to fetch pages whole
+        if not settings.HEAD_FETCH_ENABLED or self.head_fetch is None:
+            return None
+        return self.head_fetch.get("max_bytes", settings.HEAD_FETCH_MAX_BYTES)
+
+
+class SourceRegistry:
+    def __init__(self, sources):
+        self.sources = {}
+        self.categories = {}
+        self._by_category = {}
+        for source in sources:
+            self.add(source)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(Source(source_id, spec) for source_id, spec in config.items())
+
+    def add(self, source):
+        if source.id in self.sources:
+            raise ValueError(f"Duplicate source: {source.id}")
+        for name, url in source.categories.items():
+            if name in self.categories:
+                raise ValueError(f"Category {name} is defined by both {self._by_category[name].id} and {source.id}")
+            self.categories[name] = url
+            self._by_category[name] = source
+        self.sources[source.id] = source
+
+    def source_for(self, category_name):
+        return self._by_category.get(category_name)
+
+    def crawl_intervals(self):
+        return {s.id: s.crawl["interval"] for s in self.sources.values() if "interval" in s.crawl}
+
+    def crawl_concurrency(self):
+        return {s.id: s.crawl["concurrency"] for s in self.sources.values() if "concurrency" in s.crawl}
+
+    def install(self):
+        """Apply each source's rate limits and parser settings."""
+        for source in self.sources.values():
+            if source.limits:
+                fetcher.configure_source(source.id, **source.limits)
+            if source.parser:
+                parsing.SOURCE_PARSERS[source.id] = dict(parsing.DEFAULT_PARSER, **source.parser)
+            if source.parse_only:
+                parsing.ARTICLE_ELEMENTS[source.id] = {
+                    "tags": set(source.parse_only.get("tags", ())),
+                    "classes": set(source.parse_only.get("classes", ())),
+                    "class_substrings": tuple(source.parse_only.get("class_substrings", ())),
+                    "attrs": {attr: set(values) for attr, values in source.parse_only.get("attrs", {}).items()},
+                }
+        return self
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SourceRegistry.load(settings.SOURCES_PATH).install()
+        return _registry
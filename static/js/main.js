@@ -1,8 +1,259 @@
-// Form submission handler
-document.getElementById('newsForm').addEventListener('submit', function() {
-    document.getElementById('loadingIndicator').style.display = 'block';
-    document.getElementById('results').style.display = 'none';
-    document.getElementById('fetchBtn').disabled = true;
+// Icons matching the ones rendered by templates/index.html
+const categoryIcons = [
+    ['BBC Politics', 'fa-landmark'],
+    ['BBC Finance', 'fa-chart-line'],
+    ['BBC Business', 'fa-chart-line'],
+    ['Hindu Business', 'fa-chart-line'],
+    ['AlJazeera Economy', 'fa-chart-line'],
+    ['BBC Entertainment', 'fa-film'],
+    ['Hindu Entertainment', 'fa-film'],
+    ['BBC Sports', 'fa-futbol'],
+    ['Hindu Sport', 'fa-futbol'],
+    ['AlJazeera Sports', 'fa-futbol'],
+    ['BBC India', 'fa-map-marker-alt'],
+    ['Hindu National', 'fa-map-marker-alt'],
+    ['Hindu Science', 'fa-flask'],
+    ['AlJazeera Middle East', 'fa-mosque'],
+    ['AlJazeera Asia', 'fa-torii-gate'],
+    ['AlJazeera Features', 'fa-star']
+];
+
+const sourceIcons = {
+    'BBC News': ['far fa-newspaper', 'fas fa-broadcast-tower'],
+    'The Hindu': ['fas fa-om', 'fas fa-Om'],
+    'Al Jazeera': ['fas fa-globe-asia', 'fas fa-tv']
+};
+
+const escapeHtml = (value) => String(value == null ? '' : value)
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;')
+    .replace(/"/g, '&quot;')
+    .replace(/'/g, '&#39;');
+
+const categoryIcon = (category) => {
+    const match = categoryIcons.find(([name]) => category.startsWith(name));
+    return match ? match[1] : 'fa-newspaper';
+};
+
+const renderResultsHeader = (category) => `
+    <div class="results-header">
+        <h2 class="results-title">
+            Latest News
+            <span class="category-tag">
+                <i class="fas ${categoryIcon(category)}"></i>
+                ${escapeHtml(category)}
+            </span>
+        </h2>
+        <div class="results-meta">
+            <span class="articles-count">0 articles found</span>
+        </div>
+    </div>
+    <div class="news-grid"></div>`;
+
+const renderCard = (article, index) => {
+    const [imageIcon, sourceIcon] = sourceIcons[article.source] || ['far fa-newspaper', 'fas fa-newspaper'];
+    const link = escapeHtml(article.link);
+    const published = article.published_date
+        ? `<span class="news-published-date">• Published: ${escapeHtml(article.formatted_date)}</span>`
+        : '';
+    const date = article.published_date
+        ? `<i class="far fa-calendar-alt"></i> ${escapeHtml(article.published_date)}`
+        : '<i class="far fa-clock"></i> Recently published';
+
+    return `
+        <div class="news-card ${escapeHtml(article.source.toLowerCase().replace(/ /g, '-'))}">
+            <div class="news-number-badge">${index}</div>
+            <div class="news-image"><i class="${imageIcon}"></i></div>
+            <div class="news-content">
+                <div class="news-source">
+                    <i class="${sourceIcon}"></i>
+                    ${escapeHtml(article.source)}
+                    ${published}
+                </div>
+                <h3 class="news-title">
+                    <a href="${link}" target="_blank">${escapeHtml(article.headline)}</a>
+                </h3>
+                <p class="news-summary">${escapeHtml(article.summary)}</p>
+                <div class="news-footer">
+                    <div class="news-date">${date}</div>
+                    <a href="${link}" target="_blank" class="read-more">
+                        Read more <i class="fas fa-arrow-right"></i>
+                    </a>
+                </div>
+            </div>
+        </div>`;
+};
+
+const renderNoResults = () => `
+    <div class="no-results">
+        <div class="no-results-icon">
+            <i class="fas fa-search"></i>
+        </div>
+        <h3>No articles found</h3>
+        <p>Try adjusting your search criteria or selecting a different category.</p>
+    </div>`;
+
+// How often a running search job is polled when it can't be streamed
+const pollInterval = 1000;
+
+let activeJob = null;
+let activeStream = null;
+
+const stopFollowing = () => {
+    activeJob = null;
+    if (activeStream) {
+        activeStream.close();
+        activeStream = null;
+    }
+};
+
+// Append the articles of search job jobId from offset on as they are
+// scraped: streamed from /api/jobs/<id>/stream, or polled from
+// /api/jobs/<id> when EventSource isn't available or the stream breaks
+const followJob = (jobId, category, offset) => {
+    const loading = document.getElementById('loadingIndicator');
+    const results = document.getElementById('results');
+    const fetchBtn = document.getElementById('fetchBtn');
+    const token = {};
+    const jobUrl = `/api/jobs/${encodeURIComponent(jobId)}`;
+    let grid = results.querySelector('.news-grid');
+    let count = grid ? grid.children.length : 0;
+
+    stopFollowing();
+    activeJob = token;
+    loading.style.display = 'block';
+    fetchBtn.disabled = true;
+
+    const append = (article) => {
+        if (!grid) {
+            results.innerHTML = renderResultsHeader(category);
+            results.style.display = '';
+            grid = results.querySelector('.news-grid');
+        }
+        count += 1;
+        offset += 1;
+        grid.insertAdjacentHTML('beforeend', renderCard(article, count));
+        results.querySelector('.articles-count').textContent = `${count} articles found`;
+    };
+
+    const finish = () => {
+        if (activeJob !== token) {
+            return;
+        }
+        stopFollowing();
+        loading.style.display = 'none';
+        results.style.display = '';
+        fetchBtn.disabled = false;
+        if (count === 0) {
+            results.innerHTML = renderNoResults();
+        }
+    };
+
+    const poll = () => {
+        fetch(`${jobUrl}?offset=${offset}`)
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error(`job ${jobId}: HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then((job) => {
+                if (activeJob !== token) {
+                    return;
+                }
+                job.articles.forEach(append);
+                if (job.status === 'done' || job.status === 'failed') {
+                    finish();
+                } else {
+                    setTimeout(poll, pollInterval);
+                }
+            })
+            .catch(finish);
+    };
+
+    if (!window.EventSource) {
+        poll();
+        return;
+    }
+    const stream = new EventSource(`${jobUrl}/stream?offset=${offset}`);
+    activeStream = stream;
+    stream.addEventListener('article', (message) => {
+        if (activeJob === token) {
+            append(JSON.parse(message.data));
+        }
+    });
+    stream.addEventListener('done', finish);
+    stream.onerror = () => {
+        // Carry on from the last article received rather than reconnect
+        stream.close();
+        if (activeJob === token) {
+            activeStream = null;
+            poll();
+        }
+    };
+};
+
+// Form submission handler: start a search job and follow its articles,
+// falling back to the regular form POST when fetch isn't available
+document.getElementById('newsForm').addEventListener('submit', function(event) {
+    const loading = document.getElementById('loadingIndicator');
+    const results = document.getElementById('results');
+    const fetchBtn = document.getElementById('fetchBtn');
+
+    loading.style.display = 'block';
+    results.style.display = 'none';
+    fetchBtn.disabled = true;
+
+    if (!window.fetch) {
+        return;
+    }
+    event.preventDefault();
+
+    const category = this.elements.category.value;
+    const token = {};
+    stopFollowing();
+    activeJob = token;
+    results.innerHTML = '';
+
+    fetch('/api/jobs', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({
+            category: category,
+            start_date: this.elements.start_date.value,
+            end_date: this.elements.end_date.value
+        })
+    })
+        .then((response) => {
+            if (!response.ok) {
+                throw new Error(`search: HTTP ${response.status}`);
+            }
+            return response.json();
+        })
+        .then((job) => {
+            if (activeJob === token) {
+                followJob(job.job_id, category, 0);
+            }
+        })
+        .catch(() => {
+            if (activeJob !== token) {
+                return;
+            }
+            activeJob = null;
+            loading.style.display = 'none';
+            results.style.display = '';
+            fetchBtn.disabled = false;
+            results.innerHTML = renderNoResults();
+        });
+});
+
+// Keep following a search the server-rendered page was still running
+window.addEventListener('DOMContentLoaded', function() {
+    const results = document.getElementById('results');
+    if (results.dataset.jobId && window.fetch) {
+        followJob(results.dataset.jobId, results.dataset.category, Number(results.dataset.offset) || 0);
+    }
 });
 
 // Initialize date inputs
@@ -0,0 +1,154 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import logs
+from metrics import circuit_events_total, circuit_open
+
+# Factor a host's concurrency window is cut by on an overload signal
+DECREASE = 0.5
+# How often a waiting request checks whether it should give up
+POLL_SECONDS = 0.25
+
+
+def retry_after_seconds(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (now or time.time()))
+
+
+class AdaptiveLimit:
+    """AIMD concurrency window for one host.
+
+    The window starts at the configured concurrency and moves between 1 and
+    maximum. Each response faster than latency_target widens it by
+    1/window, about one slot per window's worth of requests; an overload
+    status, a failed request or a slower response halves it, at most once
+    per latency_target so one burst of slow replies counts as one signal.
+    A Retry-After pauses every request to the host until it has passed.
+    """
+
+    def __init__(self, initial, maximum, latency_target):
+        self.initial = float(initial)
+        self.limit = float(initial)
+        self.maximum = float(max(initial, maximum))
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.decreased = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self, cancelled=None):
+        """Wait for a slot; returns False without one if cancelled() becomes true."""
+        with self.condition:
+            while True:
+                if cancelled and cancelled():
+                    return False
+                now = time.monotonic()
+                if now < self.paused_until:
+                    self.condition.wait(min(self.paused_until - now, POLL_SECONDS))
+                elif self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return True
+                else:
+                    self.condition.wait(POLL_SECONDS if cancelled else None)
+
+    def cancel(self):
+        """Give back a slot that wasn't used for a request."""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def release(self, latency=None, overloaded=False, retry_after=None):
+        """Record one finished request; latency is None if it failed outright."""
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            if overloaded or latency is None or latency > self.latency_target:
+                if now - self.decreased >= self.latency_target:
+                    self.limit = max(1.0, self.limit * DECREASE)
+                    self.decreased = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    @property
+    def scale(self):
+        # Current window relative to the configured one
+        return self.limit / self.initial
+
+
+class CircuitBreaker:
+    """Stops requests to a source after repeated failures.
+
+    After `threshold` consecutive failures the circuit opens and allow()
+    refuses requests for `cooldown` seconds (or as long as the source asked
+    with trip()). Then a single trial request is let through: success
+    closes the circuit, failure opens it for another cooldown.
+    """
+
+    def __init__(self, source_type, threshold, cooldown):
+        self.source_type = source_type
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+        circuit_open.set(source_type, value=0)
+
+    @property
+    def available(self):
+        if self.state == "open":
+            return time.monotonic() >= self.open_until
+        return self.state == "closed" or not self.probing
+
+    def allow(self):
+        with self.lock:
+            if self.state == "open" and time.monotonic() >= self.open_until:
+                self.state = "half_open"
+                self.probing = False
+            if self.state == "half_open" and not self.probing:
+                self.probing = True
+                return True
+            return self.state == "closed"
+
+    def success(self):
+        with self.lock:
+            if self.state != "closed":
+                circuit_events_total.inc(self.source_type, "closed")
+                logs.info("circuit_closed", source=self.source_type)
+            self.state = "closed"
+            self.failures = 0
+            self.probing = False
+            circuit_open.set(self.source_type, value=0)
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+                self._open(self.cooldown)
+
+    def trip(self, seconds):
+        """Open the circuit for at least seconds, e.g. for a long Retry-After."""
+        with self.lock:
+            self._open(max(seconds, self.cooldown))
+
+    def _open(self, seconds):
+        self.state = "open"
+        self.probing = False
+        self.open_until = max(self.open_until, time.monotonic() + seconds)
+        circuit_open.set(self.source_type, value=1)
+        circuit_events_total.inc(self.source_type, "opened")
+        logs.warning("circuit_opened", source=self.source_type, failures=self.failures, seconds=round(seconds, 1))